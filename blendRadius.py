@@ -0,0 +1,219 @@
+"""
+คำนวณ blend radius ที่ใหญ่ที่สุดที่ปลอดภัยสำหรับแต่ละมุมของเส้นทาง
+
+ข้อจำกัดที่ใช้ต่อมุม:
+- ไม่เกิน fraction ของความยาวช่วงที่ติดกันทั้งสองข้าง (fraction <= 0.5 ทำให้ blend สองมุมติดกันไม่ทับกัน
+  ซึ่ง controller จะปฏิเสธคำสั่ง)
+- ระยะที่เส้นทางเบี่ยงจากจุดมุมไม่เกิน tolerance: สำหรับมุมที่เลี้ยว phi เรเดียน
+  ระยะเบี่ยงของ blend แบบวงกลมรัศมี r คือ r * tan(phi / 4)
+- มุมที่เกือบย้อนกลับ (เลี้ยวเกิน max_turn) ไม่ blend เพราะต้องหน่วงจนเกือบหยุดอยู่แล้ว
+
+ในการประมาณเวลา ความเร็วที่วิ่งผ่าน blend ถูกจำกัดด้วยความเร่งในแนวตั้งฉาก: sqrt(a * r / tan(phi / 2))
+"""
+import math
+
+from ur3Controller import move_command, linear_duration
+
+
+class BlendPlan:
+    """ผลการคำนวณ: radii ของแต่ละจุด, คำสั่ง URScript และเวลาที่คาดว่าจะใช้"""
+
+    def __init__(self, poses, kinds, radii, lines, stop_and_go_time, blended_time):
+        self.poses = poses
+        self.kinds = kinds
+        self.radii = radii
+        self.lines = lines
+        self.stop_and_go_time = stop_and_go_time
+        self.blended_time = blended_time
+
+    @property
+    def time_saved(self):
+        return self.stop_and_go_time - self.blended_time
+
+    def __repr__(self):
+        return (f"BlendPlan({len(self.poses)} จุด, หยุดทุกจุด {self.stop_and_go_time:.2f}s, "
+                f"blend {self.blended_time:.2f}s, ประหยัด {self.time_saved:.2f}s)")
+
+
+def _sub(p, q):
+    return (p[0] - q[0], p[1] - q[1], p[2] - q[2])
+
+
+def _norm(d):
+    return math.sqrt(d[0] * d[0] + d[1] * d[1] + d[2] * d[2])
+
+
+def turn_angle(previous, corner, following):
+    """มุมที่เส้นทางเลี้ยวที่จุด corner (0 คือตรงไป, pi คือย้อนกลับ)"""
+    d1 = _sub(corner, previous)
+    d2 = _sub(following, corner)
+    n1, n2 = _norm(d1), _norm(d2)
+    if n1 == 0 or n2 == 0:
+        return 0.0
+    c = (d1[0] * d2[0] + d1[1] * d2[1] + d1[2] * d2[2]) / (n1 * n2)
+    return math.acos(max(-1.0, min(1.0, c)))
+
+
+def max_blend_radii(poses, tolerance=0.005, fraction=0.45, max_radius=None, min_radius=0.001,
+                    start=None, max_turn=math.radians(170)):
+    """
+    blend radius ที่ใหญ่ที่สุดที่ปลอดภัยของแต่ละจุด
+
+    Args:
+        poses (list): [x, y, z, rx, ry, rz] ของแต่ละจุด
+        tolerance (float): ระยะที่ยอมให้เส้นทางเบี่ยงจากจุดมุม (เมตร) - None คือไม่จำกัด
+        fraction (float): สัดส่วนสูงสุดของความยาวช่วงที่ติดกัน (ไม่ควรเกิน 0.5)
+        max_radius (float): ค่าสูงสุดของ radius (เมตร) - None คือไม่จำกัด
+        min_radius (float): radius ที่น้อยกว่านี้ปัดเป็น 0 (หยุดที่จุดนั้น)
+        start (list): ตำแหน่งเริ่มต้นก่อนจุดแรก - None คือหยุดที่จุดแรก
+        max_turn (float): มุมที่เลี้ยวมากกว่านี้ (เรเดียน เกือบย้อนกลับ) หยุดที่จุดนั้น
+
+    Returns:
+        list: radius ของแต่ละจุด (จุดสุดท้ายเป็น 0 เสมอ)
+    """
+    points = ([start] if start is not None else []) + list(poses)
+    offset = 1 if start is not None else 0
+    lengths = [_norm(_sub(points[i + 1], points[i])) for i in range(len(points) - 1)]
+    radii = [0.0] * len(poses)
+    for k in range(len(poses) - 1):
+        i = k + offset  # index ของจุดนี้ใน points
+        if i == 0:
+            continue
+        phi = turn_angle(points[i - 1], points[i], points[i + 1])
+        if phi > max_turn:
+            continue
+        r = fraction * min(lengths[i - 1], lengths[i])
+        if tolerance is not None and phi > 1e-9:
+            r = min(r, tolerance / math.tan(phi / 4.0))
+        if max_radius is not None:
+            r = min(r, max_radius)
+        radii[k] = r if r >= min_radius else 0.0
+    return radii
+
+
+def _shortening(r, phi):
+    # ระยะทางที่สั้นลงเมื่อตัดมุมด้วยส่วนโค้ง: 2r - ความยาวส่วนโค้ง
+    if r <= 0 or phi <= 1e-9:
+        return 0.0
+    return 2.0 * r - r * phi / math.tan(phi / 2.0)
+
+
+def corner_speed(r, phi, a):
+    """
+    ความเร็วสูงสุดที่วิ่งผ่าน blend รัศมี r ของมุมที่เลี้ยว phi ได้ โดยความเร่งในแนวตั้งฉากไม่เกิน a
+
+    Returns:
+        float: m/s (math.inf ถ้าแทบไม่เลี้ยว, 0 ถ้าไม่ blend)
+    """
+    if r <= 0:
+        return 0.0
+    if phi <= 1e-9:
+        return math.inf
+    return math.sqrt(a * r / math.tan(phi / 2.0))
+
+
+def segment_profile(distance, v, a, v_in=0.0, v_out=0.0):
+    """
+    ประมาณเวลาของช่วงที่เริ่มด้วยความเร็ว v_in และจบด้วย v_out (โปรไฟล์สี่เหลี่ยมคางหมู)
+    v_in = v_out = 0 ให้ผลเท่ากับ linear_duration
+
+    Returns:
+        tuple: (เวลา (วินาที), ความเร็วสูงสุดในช่วง (m/s))
+    """
+    if distance <= 0:
+        return 0.0, max(v_in, v_out)
+    peak = math.sqrt(a * distance + (v_in * v_in + v_out * v_out) / 2.0)
+    if peak >= v:
+        ramps = (2.0 * v * v - v_in * v_in - v_out * v_out) / (2.0 * a)
+        return (2.0 * v - v_in - v_out) / a + (distance - ramps) / v, v
+    if peak < max(v_in, v_out):
+        # สั้นเกินกว่าจะเปลี่ยนความเร็วได้ทัน: ถือว่าเร่ง/หน่วงตลอดช่วง
+        return 2.0 * distance / (v_in + v_out), max(v_in, v_out)
+    return (2.0 * peak - v_in - v_out) / a, peak
+
+
+def blended_profile(poses, radii, v, a, start=None):
+    """
+    ประมาณการเคลื่อนที่ของเส้นทางแบบ blend ตาม radii: จุดที่ radius > 0 วิ่งผ่านด้วยความเร็ว
+    min(v, corner_speed) จึงเร่ง/หน่วงเฉพาะจุดที่หยุดและมุมที่ต้องลดความเร็ว
+
+    Returns:
+        tuple: (เวลา (วินาที), ความเร็ว TCP สูงสุด (m/s), ระยะที่ตัดมุมมากที่สุด (เมตร))
+    """
+    if not poses:
+        return 0.0, 0.0, 0.0
+    points = [start if start is not None else poses[0]] + list(poses)
+    duration = 0.0
+    peak = 0.0
+    deviation = 0.0
+    run = 0.0
+    entry = 0.0
+    for k in range(len(poses)):
+        run += _norm(_sub(points[k + 1], points[k]))
+        r = radii[k]
+        if r > 0 and k < len(poses) - 1:
+            phi = turn_angle(points[k], points[k + 1], points[k + 2])
+            run -= _shortening(r, phi)
+            deviation = max(deviation, r * math.tan(phi / 4.0))
+            speed = min(v, corner_speed(r, phi, a))
+        else:
+            speed = 0.0
+        # ช่วงจบที่จุดหยุดหรือมุมที่ต้องลดความเร็ว (ช่วงสั้นอาจเร่งไม่ถึง v)
+        if speed < v:
+            seconds, top = segment_profile(run, v, a, entry, speed)
+            duration += seconds
+            peak = max(peak, top)
+            entry = speed
+            run = 0.0
+    return duration, peak, deviation
+
+
+def estimate_times(poses, radii, v, a, start=None):
+    """
+    ประมาณเวลาของเส้นทางแบบหยุดทุกจุด และแบบ blend ตาม radii (ดู blended_profile)
+
+    Returns:
+        tuple: (เวลาแบบหยุดทุกจุด, เวลาแบบ blend) หน่วยวินาที
+    """
+    if not poses:
+        return 0.0, 0.0
+    points = [start if start is not None else poses[0]] + list(poses)
+    stop_and_go = sum(linear_duration(_norm(_sub(points[k + 1], points[k])), v, a) for k in range(len(poses)))
+    return stop_and_go, blended_profile(poses, radii, v, a, start)[0]
+
+
+def plan_blends(poses, v=0.25, a=1.2, tolerance=0.005, kinds=None, start=None, **limits):
+    """
+    คำนวณ blend radius ของทั้งเส้นทาง สร้างโปรแกรม URScript และประมาณเวลาที่ประหยัดได้
+
+    Args:
+        poses (list): [x, y, z, rx, ry, rz] ของแต่ละจุด
+        v (float): ความเร็ว (m/s)
+        a (float): ความเร่ง (m/s^2)
+        tolerance (float): ระยะที่ยอมให้เส้นทางเบี่ยงจากจุดมุม (เมตร)
+        kinds (list): "movel"/"movej" ของแต่ละจุด - None คือ movel ทุกจุด
+        start (list): ตำแหน่งเริ่มต้น - None คือหยุดที่จุดแรก
+        limits: fraction, max_radius, min_radius ส่งต่อให้ max_blend_radii
+
+    Returns:
+        BlendPlan: ใช้ plan.lines กับ robot.send_program()
+    """
+    poses = [list(p) for p in poses]
+    kinds = list(kinds) if kinds is not None else ["movel"] * len(poses)
+    radii = max_blend_radii(poses, tolerance, start=start, **limits)
+    lines = [move_command(kind, pose, a, v, 0, round(r, 5))
+             for kind, pose, r in zip(kinds, poses, radii)]
+    stop_and_go, blended = estimate_times(poses, radii, v, a, start)
+    return BlendPlan(poses, kinds, radii, lines, stop_and_go, blended)
+
+
+def blend_path(path, tolerance=0.005, start=None, **limits):
+    """
+    คำนวณ blend radius ให้ WaypointPath (ใส่ไว้ใน path.radii ซึ่ง robot.run_path ใช้แทน path.r)
+
+    Returns:
+        BlendPlan
+    """
+    plan = plan_blends(path.poses, path.v, path.a, tolerance, path.kinds, start, **limits)
+    path.radii = plan.radii
+    return plan
@@ -1,6 +1,6 @@
 
 import rgGripper
-import time
+import urTrace
 
 def test_start():
 
@@ -17,13 +17,13 @@ def test_start():
     target_force = 40.00
 
     rg_gripper.rg_grip(100.0, target_force)
-    time.sleep(3)
+    urTrace.sleep(3)
     rg_gripper.rg_grip(50.0, target_force)
-    time.sleep(3)
+    urTrace.sleep(3)
     rg_gripper.rg_grip(80.0, target_force)
-    time.sleep(3)
+    urTrace.sleep(3)
     rg_gripper.rg_grip(10.0, target_force)
-    time.sleep(3)
+    urTrace.sleep(3)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,272 @@
+"""
+แปลงพิกัดระหว่าง frame (กล้อง, ชิ้นงาน, เครื่องมือ/TCP) กับ frame ฐานของแขนกลแบบ vectorized ด้วย NumPy
+
+pose ทั้งหมดใช้รูปแบบเดียวกับ URScript: [x, y, z, rx, ry, rz] โดย rx, ry, rz เป็น rotation vector
+ทุกฟังก์ชันรับข้อมูลเป็นชุด (..., 6) หรือ (..., 3) และทำงานในการเรียก NumPy ครั้งเดียวทั้งชุด
+"""
+import numpy as np
+
+_EPS = 1e-12
+
+
+def rotvec_to_matrix(rotvec):
+    """
+    แปลง rotation vector เป็น rotation matrix (สูตร Rodrigues)
+
+    Args:
+        rotvec (array): รูปร่าง (..., 3)
+
+    Returns:
+        ndarray: รูปร่าง (..., 3, 3)
+    """
+    rv = np.asarray(rotvec, dtype=float)
+    theta = np.linalg.norm(rv, axis=-1)
+    small = theta < 1e-8
+    safe = np.where(small, 1.0, theta)
+    k = rv / safe[..., None]
+    kx, ky, kz = k[..., 0], k[..., 1], k[..., 2]
+    zero = np.zeros_like(kx)
+    K = np.stack([np.stack([zero, -kz, ky], -1),
+                  np.stack([kz, zero, -kx], -1),
+                  np.stack([-ky, kx, zero], -1)], -2)
+    s = np.where(small, 0.0, np.sin(safe))[..., None, None]
+    c = np.where(small, 0.0, 1.0 - np.cos(safe))[..., None, None]
+    return np.eye(3) + s * K + c * (K @ K)
+
+
+def matrix_to_rotvec(R):
+    """
+    แปลง rotation matrix เป็น rotation vector (มุม 0 ถึง pi) ผ่าน quaternion
+    เพื่อให้ได้ค่าที่ถูกต้องแม้มุมใกล้ pi เช่นท่าเครื่องมือชี้ลง [2.2185, -2.2185, 0]
+
+    Args:
+        R (array): รูปร่าง (..., 3, 3)
+
+    Returns:
+        ndarray: รูปร่าง (..., 3)
+    """
+    R = np.asarray(R, dtype=float)
+    m00, m01, m02 = R[..., 0, 0], R[..., 0, 1], R[..., 0, 2]
+    m10, m11, m12 = R[..., 1, 0], R[..., 1, 1], R[..., 1, 2]
+    m20, m21, m22 = R[..., 2, 0], R[..., 2, 1], R[..., 2, 2]
+
+    # เลือกสูตรตามค่า diagonal ที่ใหญ่ที่สุด (Shepperd) เพื่อไม่ให้หารด้วยค่าที่ใกล้ศูนย์
+    diag = np.stack([m00 + m11 + m22, m00, m11, m22], -1)
+    choice = np.argmax(diag, axis=-1)
+    s = np.stack([1 + m00 + m11 + m22, 1 + m00 - m11 - m22,
+                  1 - m00 + m11 - m22, 1 - m00 - m11 + m22], -1)
+    s = np.sqrt(np.maximum(s, _EPS)) * 2  # = 4 * component ที่เลือก
+    candidates = np.stack([
+        np.stack([s[..., 0] / 4, (m21 - m12) / s[..., 0], (m02 - m20) / s[..., 0], (m10 - m01) / s[..., 0]], -1),
+        np.stack([(m21 - m12) / s[..., 1], s[..., 1] / 4, (m01 + m10) / s[..., 1], (m02 + m20) / s[..., 1]], -1),
+        np.stack([(m02 - m20) / s[..., 2], (m01 + m10) / s[..., 2], s[..., 2] / 4, (m12 + m21) / s[..., 2]], -1),
+        np.stack([(m10 - m01) / s[..., 3], (m02 + m20) / s[..., 3], (m12 + m21) / s[..., 3], s[..., 3] / 4], -1),
+    ], -2)
+    q = np.take_along_axis(candidates, choice[..., None, None], axis=-2)[..., 0, :]
+    q = np.where(q[..., :1] < 0, -q, q)  # ให้ w >= 0 เพื่อให้มุมอยู่ในช่วง [0, pi]
+
+    w, v = q[..., 0], q[..., 1:]
+    vnorm = np.linalg.norm(v, axis=-1)
+    angle = 2.0 * np.arctan2(vnorm, w)
+    scale = np.where(vnorm > 1e-12, angle / np.where(vnorm > 1e-12, vnorm, 1.0), 2.0)
+    return v * scale[..., None]
+
+
+def pose_to_matrix(pose):
+    """
+    แปลง pose [x, y, z, rx, ry, rz] เป็น homogeneous transform
+
+    Args:
+        pose (array): รูปร่าง (..., 6)
+
+    Returns:
+        ndarray: รูปร่าง (..., 4, 4)
+    """
+    pose = np.asarray(pose, dtype=float)
+    T = np.zeros(pose.shape[:-1] + (4, 4))
+    T[..., :3, :3] = rotvec_to_matrix(pose[..., 3:6])
+    T[..., :3, 3] = pose[..., :3]
+    T[..., 3, 3] = 1.0
+    return T
+
+
+def matrix_to_pose(T):
+    """
+    แปลง homogeneous transform เป็น pose [x, y, z, rx, ry, rz]
+
+    Args:
+        T (array): รูปร่าง (..., 4, 4)
+
+    Returns:
+        ndarray: รูปร่าง (..., 6)
+    """
+    T = np.asarray(T, dtype=float)
+    return np.concatenate([T[..., :3, 3], matrix_to_rotvec(T[..., :3, :3])], -1)
+
+
+def compose(a, b):
+    """
+    ต่อ pose สองชุดเข้าด้วยกัน เหมือน pose_trans(a, b) ใน URScript (รองรับ broadcasting)
+
+    Returns:
+        ndarray: รูปร่าง (..., 6)
+    """
+    return matrix_to_pose(pose_to_matrix(a) @ pose_to_matrix(b))
+
+
+def invert(pose):
+    """pose ผกผัน เหมือน pose_inv() ใน URScript"""
+    T = pose_to_matrix(pose)
+    Rt = np.swapaxes(T[..., :3, :3], -1, -2)
+    inv = np.zeros_like(T)
+    inv[..., :3, :3] = Rt
+    inv[..., :3, 3] = -(Rt @ T[..., :3, 3, None])[..., 0]
+    inv[..., 3, 3] = 1.0
+    return matrix_to_pose(inv)
+
+
+def transform_points(T, points):
+    """
+    แปลงตำแหน่งจุดชุดหนึ่งด้วย transform เดียว
+
+    Args:
+        T (array): (4, 4) หรือ pose (6,)
+        points (array): รูปร่าง (N, 3)
+
+    Returns:
+        ndarray: รูปร่าง (N, 3)
+    """
+    T = np.asarray(T, dtype=float)
+    if T.shape == (6,):
+        T = pose_to_matrix(T)
+    points = np.asarray(points, dtype=float)
+    return points @ T[:3, :3].T + T[:3, 3]
+
+
+class FrameRegistry:
+    def __init__(self):
+        """
+        เก็บ frame ที่มีชื่อ (เช่น "camera", "work") โดยแต่ละ frame อ้างอิง frame แม่
+        จนถึง "base" และเก็บ transform ที่ต่อกันแล้วไว้ใน cache จนกว่าจะมีการเปลี่ยน frame
+        offset ของเครื่องมือเทียบกับ TCP เก็บแยกด้วย set_tool() เพราะไม่ได้อ้างอิงกับ base
+        """
+        self._frames = {}
+        self._cache = {}
+        self._tools = {}
+
+    def set(self, name, pose, parent="base"):
+        """
+        กำหนดหรือปรับตำแหน่งของ frame
+
+        Args:
+            name (str): ชื่อ frame
+            pose (list): [x, y, z, rx, ry, rz] ของ frame นี้เทียบกับ parent
+            parent (str): frame แม่ (ค่าเริ่มต้นคือฐานของแขนกล)
+        """
+        if name == "base":
+            raise ValueError("ไม่สามารถกำหนด frame base ได้")
+        p = parent
+        while p != "base":
+            if p == name:
+                raise ValueError(f"frame {name} อ้างอิงเป็นวง")
+            if p not in self._frames:
+                raise KeyError(f"ไม่พบ frame {p}")
+            p = self._frames[p][0]
+        self._frames[name] = (parent, pose_to_matrix(pose))
+        # frame ลูกทั้งหมดเปลี่ยนตามด้วย จึงล้าง cache ทั้งหมด (frame เปลี่ยนไม่บ่อย)
+        self._cache.clear()
+
+    def remove(self, name):
+        """ลบ frame (ต้องลบ frame ลูกที่อ้างอิง frame นี้ก่อน)"""
+        if name not in self._frames:
+            raise KeyError(f"ไม่พบ frame {name}")
+        children = [child for child, (parent, _) in self._frames.items() if parent == name]
+        if children:
+            raise ValueError(f"frame {name} ยังเป็น parent ของ {', '.join(children)}")
+        del self._frames[name]
+        self._cache.clear()
+
+    def __contains__(self, name):
+        return name == "base" or name in self._frames
+
+    def matrix(self, name):
+        """transform จาก frame name ไปยัง base (4x4, ถูก cache ไว้)"""
+        if name == "base":
+            return np.eye(4)
+        T = self._cache.get(name)
+        if T is None:
+            parent, local = self._frames[name]
+            T = self.matrix(parent) @ local
+            T.setflags(write=False)
+            self._cache[name] = T
+        return T
+
+    def pose(self, name):
+        """pose ของ frame name เทียบกับ base"""
+        return matrix_to_pose(self.matrix(name))
+
+    def points_to_base(self, name, points):
+        """
+        แปลงตำแหน่งจุดจาก frame name เป็นพิกัดฐาน
+
+        Args:
+            points (array): รูปร่าง (N, 3)
+
+        Returns:
+            ndarray: รูปร่าง (N, 3)
+        """
+        return transform_points(self.matrix(name), points)
+
+    def to_base(self, name, positions, rotvecs=None):
+        """
+        แปลงตำแหน่งและการหมุนชุดหนึ่ง (เช่น ผลตรวจจับจากกล้อง) จาก frame name เป็น pose ในพิกัดฐาน
+
+        Args:
+            name (str): frame ของข้อมูล
+            positions (array): รูปร่าง (N, 3)
+            rotvecs (array): รูปร่าง (N, 3) - None คือใช้การหมุนของ frame เอง
+
+        Returns:
+            ndarray: รูปร่าง (N, 6) พร้อมส่งให้ move_linear/move_to_pose
+        """
+        T = self.matrix(name)
+        positions = np.asarray(positions, dtype=float)
+        out = np.empty(positions.shape[:-1] + (6,))
+        out[..., :3] = positions @ T[:3, :3].T + T[:3, 3]
+        if rotvecs is None:
+            out[..., 3:] = matrix_to_rotvec(T[:3, :3])
+        else:
+            out[..., 3:] = matrix_to_rotvec(T[:3, :3] @ rotvec_to_matrix(rotvecs))
+        return out
+
+    def from_base(self, name, poses):
+        """แปลง pose ในพิกัดฐานเป็น pose เทียบกับ frame name"""
+        T = np.linalg.inv(self.matrix(name))
+        return matrix_to_pose(T @ pose_to_matrix(poses))
+
+    def set_tool(self, pose, name="tool"):
+        """
+        กำหนด offset ของปลายเครื่องมือเทียบกับ TCP (ใช้กับ tcp_targets)
+
+        Args:
+            pose (list): [x, y, z, rx, ry, rz] ของปลายเครื่องมือในพิกัดของ TCP
+            name (str): ชื่อเครื่องมือ
+        """
+        self._tools[name] = pose_to_matrix(pose)
+
+    def tcp_targets(self, poses, tool="tool"):
+        """
+        คำนวณ pose ของ TCP ที่ controller ต้องไป เพื่อให้ปลายเครื่องมือ (offset จาก set_tool)
+        อยู่ที่ poses ใช้เมื่อไม่ได้ตั้ง TCP offset ไว้ใน controller
+
+        Args:
+            poses (array): pose ของปลายเครื่องมือในพิกัดฐาน (N, 6)
+            tool (str): ชื่อเครื่องมือที่กำหนดด้วย set_tool()
+
+        Returns:
+            ndarray: รูปร่าง (N, 6)
+        """
+        local = self._tools.get(tool)
+        if local is None:
+            raise KeyError(f"ไม่พบเครื่องมือ {tool} (กำหนดด้วย set_tool)")
+        return matrix_to_pose(pose_to_matrix(poses) @ np.linalg.inv(local))
@@ -0,0 +1,197 @@
+import threading
+import time
+
+import urMetrics
+import urTrace
+
+
+class GripperState:
+    """ค่าสถานะของ gripper ณ เวลาที่อ่าน (updated คือ time.perf_counter())"""
+    __slots__ = ("width", "busy", "grip_detected", "updated")
+
+    def __init__(self, width=None, busy=None, grip_detected=None, updated=0.0):
+        self.width = width
+        self.busy = busy
+        self.grip_detected = grip_detected
+        self.updated = updated
+
+    def age(self):
+        """อายุของข้อมูล (วินาที)"""
+        return time.perf_counter() - self.updated
+
+    def __repr__(self):
+        return (f"GripperState(width={self.width}, busy={self.busy}, "
+                f"grip_detected={self.grip_detected}, age={self.age() * 1000:.0f}ms)")
+
+
+class GripperStateCache:
+    def __init__(self, gripper, rate=5.0, ttl=0.5, stream=None, busy_input=None, grip_input=None,
+                 status=True):
+        """
+        อ่านความกว้างและสถานะของ gripper ใน background แล้วให้ผู้เรียกอ่านจาก cache ทันที
+        คำสั่ง XML-RPC ไปยัง gripper จึงมีไม่เกิน rate ครั้งต่อวินาทีต่อค่า ไม่ว่าจะมีผู้อ่านกี่ราย
+        cache ถูกล้างเมื่อสั่ง rg_grip และอ่านใหม่ทันทีเมื่อคำสั่งเสร็จ
+
+        Args:
+            gripper (RG2): gripper
+            rate (float): จำนวนครั้งที่อ่านค่าต่อวินาที
+            ttl (float): อายุสูงสุดของค่าที่ยอมคืนให้ผู้เรียก (วินาที) ถ้าเก่ากว่านี้จะรอค่าใหม่
+            stream (StateStream): state stream ของแขนกล ใช้อ่าน busy/grip_detected จาก tool I/O
+            busy_input (int): bit ของ digital input (ใน state.digital_inputs) ที่ต่อกับสัญญาณ busy
+                เช่น 16 คือ tool input 0 - None คืออ่านผ่าน XML-RPC
+            grip_input (int): bit ของ digital input ที่ต่อกับสัญญาณ grip detected - None คืออ่านผ่าน XML-RPC
+            status (bool): อ่าน busy/grip_detected ผ่าน XML-RPC ด้วย (ถ้าไม่ได้มาจาก tool I/O)
+        """
+        self.gripper = gripper
+        self.rate = rate
+        self.ttl = ttl
+        self.stream = stream
+        self.busy_input = busy_input
+        self.grip_input = grip_input
+        self.status = status
+        self._state = GripperState()
+        self._io = None  # (busy, grip_detected, เวลา) ล่าสุดจาก tool I/O
+        self._condition = threading.Condition()
+        self._wake = threading.Event()
+        self._running = False
+        self._generation = 0
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """เริ่ม thread ที่อ่านค่าจาก gripper"""
+        if self._running:
+            return self
+        self._running = True
+        self.gripper.on_grip(self.invalidate)
+        if self.stream is not None and (self.busy_input is not None or self.grip_input is not None):
+            self.stream.subscribe(self._on_state)
+        self._thread = threading.Thread(target=self._run, name="rg-state", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """หยุดอ่านค่า"""
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        self.gripper.remove_grip_listener(self.invalidate)
+        if self.stream is not None:
+            self.stream.unsubscribe(self._on_state)
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def invalidate(self):
+        """ล้างค่าที่เก็บไว้และให้ thread อ่านค่าใหม่ทันที (ถูกเรียกเองเมื่อสั่ง rg_grip)"""
+        with self._condition:
+            self._generation += 1
+            self._state = GripperState()
+        urTrace.instant("rg_cache_invalidate", "gripper")
+        self._wake.set()
+
+    def _on_state(self, state):
+        bits = state.digital_inputs
+        busy = None if self.busy_input is None else bool(bits >> self.busy_input & 1)
+        grip = None if self.grip_input is None else bool(bits >> self.grip_input & 1)
+        self._io = (busy, grip, state.received)
+
+    def _poll(self):
+        gripper = self.gripper
+        generation = self._generation
+        width = gripper.get_rg_width()
+        busy = grip = None
+        if self.status:
+            if self.busy_input is None or self.stream is None:
+                busy = gripper.get_rg_busy()
+            if self.grip_input is None or self.stream is None:
+                grip = gripper.get_rg_grip_detected()
+        with self._condition:
+            # ค่าที่อ่านได้ระหว่างที่มีการสั่ง rg_grip อาจเป็นค่าก่อนเคลื่อนที่ จึงทิ้งไป
+            if generation != self._generation:
+                return
+            self._state = GripperState(width, busy, grip, time.perf_counter())
+            self._condition.notify_all()
+
+    def _run(self):
+        failing = False
+        while self._running:
+            try:
+                self._poll()
+                failing = False
+            except Exception as e:
+                # ใช้ค่าเดิมต่อไป (อายุของข้อมูลจะเพิ่มขึ้นจนเกิน ttl) และพิมพ์เฉพาะครั้งแรกที่ล้มเหลว
+                if not failing:
+                    print(f"อ่านสถานะ gripper ไม่สำเร็จ: {e}")
+                failing = True
+            self._wake.wait(1.0 / self.rate)
+            self._wake.clear()
+
+    def get(self, max_age=None, timeout=None):
+        """
+        สถานะล่าสุด ถ้าเก่ากว่า max_age จะรอการอ่านครั้งถัดไป
+
+        Args:
+            max_age (float): อายุสูงสุดที่ยอมรับ (วินาที) - None คือใช้ ttl
+            timeout (float): เวลารอค่าใหม่สูงสุด (วินาที) - None คือรอไม่เกินสองรอบการอ่าน
+
+        Returns:
+            GripperState: หรือ None ถ้าไม่ได้ค่าใหม่ภายในเวลาที่กำหนด
+        """
+        max_age = self.ttl if max_age is None else max_age
+        timeout = 2.0 / self.rate if timeout is None else timeout
+        deadline = time.perf_counter() + timeout
+        with self._condition:
+            while self._state.width is None or self._state.age() > max_age:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self._running:
+                    return None
+                # รอรอบการอ่านถัดไปของ thread แทนการอ่านเอง เพื่อจำกัดจำนวนคำสั่งไปยัง gripper
+                self._condition.wait(remaining)
+            state = self._state
+        io = self._io
+        if io is not None and time.perf_counter() - io[2] <= max_age:
+            # tool I/O มาจาก state stream จึงใหม่กว่าค่าที่อ่านผ่าน XML-RPC
+            state = GripperState(state.width, state.busy if io[0] is None else io[0],
+                                 state.grip_detected if io[1] is None else io[1], state.updated)
+        urMetrics.observe_value("rg_state_staleness_seconds", state.age())
+        return state
+
+    def get_rg_width(self, max_age=None):
+        """
+        ความกว้างจาก cache (ใช้แทน RG2.get_rg_width ได้)
+
+        Returns:
+            float: หรือ None ถ้าไม่ได้ค่าใหม่ภายในเวลาที่กำหนด
+        """
+        state = self.get(max_age)
+        return None if state is None else state.width
+
+    def get_rg_busy(self, max_age=None):
+        """
+        busy จาก cache (ใช้แทน RG2.get_rg_busy ได้)
+
+        Returns:
+            bool: หรือ None ถ้าไม่ได้อ่านค่านี้ (status=False และไม่มี busy_input) หรือไม่ได้ค่าใหม่ทันเวลา
+        """
+        state = self.get(max_age)
+        return None if state is None else state.busy
+
+    def get_rg_grip_detected(self, max_age=None):
+        """grip_detected จาก cache (ใช้แทน RG2.get_rg_grip_detected ได้) - None ถ้าไม่ทราบ"""
+        state = self.get(max_age)
+        return None if state is None else state.grip_detected
+
+    def rg_grip(self, target_width=100, target_force=10):
+        """ส่งต่อให้ gripper (cache ถูกล้างผ่าน on_grip) ใช้แทน RG2 ใน PickPlacePipeline ได้"""
+        return self.gripper.rg_grip(target_width, target_force)
@@ -0,0 +1,313 @@
+import threading
+import time
+from collections import deque
+
+import urTrace
+from ur3Controller import move_command, at_pose
+
+QUEUED = "queued"
+ACTIVE = "active"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class MoveHandle:
+    """การเคลื่อนที่หนึ่งคำสั่งที่ส่งเข้าคิว ใช้ติดตามสถานะ รอ หรือยกเลิก"""
+
+    def __init__(self, queue, kind, pose, a, v, r):
+        self.kind = kind
+        self.pose = list(pose)
+        self.a = a
+        self.v = v
+        self.r = r
+        self.state = QUEUED
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self._queue = queue
+        self._event = threading.Event()
+        self._callbacks = []
+
+    def done(self):
+        """True เมื่อจบแล้ว (ถึงเป้าหมาย ถูกยกเลิก หรือล้มเหลว)"""
+        return self._event.is_set()
+
+    def reached(self):
+        return self.state == DONE
+
+    def cancelled(self):
+        return self.state == CANCELLED
+
+    def wait(self, timeout=None):
+        """
+        รอจนคำสั่งนี้จบ
+
+        Returns:
+            bool: True ถ้าถึงเป้าหมาย, False ถ้าหมดเวลา ถูกยกเลิก หรือล้มเหลว
+        """
+        self._event.wait(timeout)
+        return self.state == DONE
+
+    def cancel(self):
+        """ยกเลิกคำสั่งนี้ (ถ้ากำลังเคลื่อนที่อยู่จะสั่งหยุดแล้วเริ่มคำสั่งถัดไป)"""
+        return self._queue.cancel(self)
+
+    def add_done_callback(self, callback):
+        """
+        ลงทะเบียนฟังก์ชันที่ถูกเรียกเมื่อคำสั่งจบ (รับ MoveHandle หนึ่งตัว) ถูกเรียกบน thread
+        ของ state stream จึงควรทำงานให้เสร็จเร็ว และไม่ควร submit แบบรอ (ถ้าคิวเต็มจะค้าง)
+        ถ้าจบแล้วจะถูกเรียกทันที
+        """
+        with self._queue._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def __repr__(self):
+        return f"MoveHandle({self.kind} {[round(v, 4) for v in self.pose[:3]]}, {self.state})"
+
+
+class MotionQueue:
+    def __init__(self, robot, depth=8, tolerance=0.002, speed_tolerance=0.005, stop_acceleration=2.0,
+                 angle_tolerance=0.01):
+        """
+        คิวคำสั่งเคลื่อนที่ของแขนกล: ส่งคำสั่งทีละคำสั่ง และส่งคำสั่งถัดไปเมื่อ state stream แสดงว่า
+        ถึงเป้าหมายและหยุดนิ่งแล้ว (คำสั่งที่ส่งผ่านพอร์ต 30002 จะขัดจังหวะคำสั่งก่อนหน้า จึงส่งล่วงหน้าไม่ได้)
+
+        Args:
+            robot (UR3Controller): แขนกลที่เชื่อมต่อแล้วและเปิด state stream
+            depth (int): จำนวนคำสั่งที่รอได้สูงสุด (ไม่นับคำสั่งที่กำลังทำ) submit จะรอเมื่อคิวเต็ม
+            tolerance (float): ระยะห่างจากเป้าหมายที่ถือว่าถึงแล้ว (เมตร)
+            speed_tolerance (float): ความเร็วปลายแขนที่ถือว่าหยุดนิ่ง (m/s)
+            stop_acceleration (float): ความหน่วงของ stopj/stopl ตอนยกเลิกหรือแทรกคำสั่ง
+            angle_tolerance (float): มุมห่างจากการหมุนของเป้าหมายที่ถือว่าถึงแล้ว (เรเดียน)
+        """
+        self.robot = robot
+        self.depth = depth
+        self.tolerance = tolerance
+        self.speed_tolerance = speed_tolerance
+        self.stop_acceleration = stop_acceleration
+        self.angle_tolerance = angle_tolerance
+        self.active = None
+        self._pending = deque()
+        self._lock = threading.Condition()
+        self._stream = None
+
+    def start(self):
+        """เริ่มติดตามการเคลื่อนที่จาก state stream ของแขนกล"""
+        stream = self.robot.state_stream
+        if stream is None:
+            raise RuntimeError("ต้องเปิด state stream ก่อน (robot.start_state_stream())")
+        self._stream = stream
+        stream.subscribe(self._on_state)
+        return self
+
+    def stop(self):
+        """ยกเลิกคำสั่งที่รออยู่ทั้งหมดและหยุดติดตาม (ไม่สั่งหยุดแขนกล)"""
+        if self._stream is not None:
+            self._stream.unsubscribe(self._on_state)
+            self._stream = None
+        finished = []
+        with self._lock:
+            finished += self._drain(CANCELLED)
+            if self.active is not None:
+                finished.append(self._finish(self.active, CANCELLED))
+                self.active = None
+            self._lock.notify_all()
+        self._run_callbacks(finished)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending) + (self.active is not None)
+
+    def submit(self, kind, pose, a=1.2, v=0.25, r=0, on_done=None, block=True, timeout=None):
+        """
+        เพิ่มคำสั่งเคลื่อนที่เข้าคิว
+
+        Args:
+            kind (str): "movel" หรือ "movej"
+            pose (list): [x, y, z, rx, ry, rz]
+            a, v: ความเร่ง ความเร็ว เหมือน move_to_pose
+            r: ต้องเป็น 0 (คำสั่งถูกส่งทีละคำสั่งและรอให้หยุด จึง blend ไม่ได้ ใช้ send_program แทน)
+            on_done (callable): เรียกเมื่อคำสั่งจบ (รับ MoveHandle)
+            block (bool): รอเมื่อคิวเต็ม - False คือคืน None ทันทีถ้าคิวเต็ม
+            timeout (float): เวลารอคิวว่างสูงสุด (วินาที)
+
+        Returns:
+            MoveHandle: หรือ None ถ้าคิวเต็ม - ถ้า robot.abort_event ถูกตั้งอยู่จะคืน handle ที่ FAILED แล้ว
+        """
+        if r:
+            raise ValueError("MotionQueue ส่งคำสั่งทีละคำสั่ง จึง blend ไม่ได้ (r ต้องเป็น 0)")
+        handle = MoveHandle(self, kind, pose, a, v, r)
+        if on_done is not None:
+            handle._callbacks.append(on_done)
+        finished = []
+        with self._lock:
+            if not self._lock.wait_for(lambda: len(self._pending) < self.depth,
+                                       timeout if block else 0):
+                return None
+            self._pending.append(handle)
+            if self.active is None:
+                finished += self._start_next()
+        self._run_callbacks(finished)
+        return handle
+
+    def move_to_pose(self, x, y, z, rx, ry, rz, a=1.2, v=0.25, r=0, **kwargs):
+        """เหมือน robot.move_to_pose แต่เข้าคิวและคืน MoveHandle"""
+        return self.submit("movej", (x, y, z, rx, ry, rz), a, v, r, **kwargs)
+
+    def move_linear(self, x, y, z, rx, ry, rz, a=1.2, v=0.11, r=0, **kwargs):
+        """เหมือน robot.move_linear แต่เข้าคิวและคืน MoveHandle"""
+        return self.submit("movel", (x, y, z, rx, ry, rz), a, v, r, **kwargs)
+
+    def preempt(self, kind, pose, a=1.2, v=0.25, r=0, on_done=None):
+        """
+        ยกเลิกทุกคำสั่ง (ที่รอและที่กำลังทำ) แล้วไปยังเป้าหมายใหม่ทันที โดยส่ง stopl/stopj
+        ตามด้วยคำสั่งใหม่เป็นโปรแกรมเดียว จึงไม่มีช่วงที่แขนกลรอคำสั่ง
+
+        Returns:
+            MoveHandle: ของเป้าหมายใหม่
+        """
+        if r:
+            raise ValueError("MotionQueue ส่งคำสั่งทีละคำสั่ง จึง blend ไม่ได้ (r ต้องเป็น 0)")
+        handle = MoveHandle(self, kind, pose, a, v, r)
+        if on_done is not None:
+            handle._callbacks.append(on_done)
+        with self._lock:
+            finished = self._drain(CANCELLED)
+            previous = self.active
+            if previous is not None:
+                finished.append(self._finish(previous, CANCELLED))
+            stop = self._stop_line(previous)
+            self.active = None
+            finished += self._activate(handle, [stop] if stop else [])
+            self._lock.notify_all()
+        urTrace.instant("preempt", "queue")
+        self._run_callbacks(finished)
+        return handle
+
+    def cancel(self, handle):
+        """
+        ยกเลิกคำสั่ง: ถ้ายังรออยู่จะถูกนำออกจากคิว ถ้ากำลังเคลื่อนที่จะสั่งหยุดแล้วเริ่มคำสั่งถัดไป
+
+        Returns:
+            bool: False ถ้าคำสั่งจบไปแล้ว
+        """
+        with self._lock:
+            if handle.done():
+                return False
+            if handle.state == QUEUED:
+                self._pending.remove(handle)
+                finished = [self._finish(handle, CANCELLED)]
+                self._lock.notify_all()
+            else:
+                finished = [self._finish(handle, CANCELLED)]
+                stop = self._stop_line(handle)
+                self.active = None
+                if self._pending:
+                    finished += self._start_next([stop])
+                else:
+                    self.robot.send(stop + "\n")
+        self._run_callbacks(finished)
+        return True
+
+    def cancel_all(self):
+        """ยกเลิกทุกคำสั่งและสั่งหยุดแขนกล"""
+        with self._lock:
+            finished = self._drain(CANCELLED)
+            active = self.active
+            if active is not None:
+                finished.append(self._finish(active, CANCELLED))
+                self.active = None
+                self.robot.send(self._stop_line(active) + "\n")
+            self._lock.notify_all()
+        self._run_callbacks(finished)
+
+    def wait_idle(self, timeout=None):
+        """
+        รอจนไม่มีคำสั่งเหลือในคิว
+
+        Returns:
+            bool: False ถ้าหมดเวลา
+        """
+        with self._lock:
+            return self._lock.wait_for(lambda: self.active is None and not self._pending, timeout)
+
+    # ---- ส่วนภายใน (เรียกขณะถือ _lock ยกเว้น _run_callbacks) ----
+
+    def _stop_line(self, handle):
+        if handle is None:
+            return None
+        return f"{'stopl' if handle.kind == 'movel' else 'stopj'}({self.stop_acceleration})"
+
+    def _finish(self, handle, state):
+        handle.state = state
+        handle.finished = time.perf_counter()
+        handle._event.set()
+        urTrace.instant(f"{handle.kind} {state}", "queue")
+        callbacks, handle._callbacks = handle._callbacks, []
+        return handle, callbacks
+
+    def _drain(self, state):
+        finished = [self._finish(handle, state) for handle in self._pending]
+        self._pending.clear()
+        return finished
+
+    def _start_next(self, prefix=()):
+        if not self._pending:
+            return []
+        handle = self._pending.popleft()
+        self._lock.notify_all()
+        return self._activate(handle, list(prefix))
+
+    def _activate(self, handle, prefix):
+        if self.robot.abort_event.is_set():
+            # หยุดกะทันหันค้างอยู่ (ยังไม่ได้ reset): ไม่ส่งคำสั่งใหม่ให้แขนกล
+            self._lock.notify_all()
+            return [self._finish(handle, FAILED)] + self._drain(FAILED)
+        line = move_command(handle.kind, handle.pose, handle.a, handle.v, 0, handle.r).strip()
+        lines = prefix + [line]
+        self.active = handle
+        handle.state = ACTIVE
+        handle.started = time.perf_counter()
+        urTrace.instant(f"{handle.kind} start", "queue", {"pose": handle.pose})
+        command = line + "\n" if len(lines) == 1 else \
+            "def ur_queue():\n" + "".join(f"  {l}\n" for l in lines) + "end\n"
+        if not self.robot.send(command):
+            self.active = None
+            finished = [self._finish(handle, FAILED)]
+            return finished + self._start_next()
+        return []
+
+    def _on_state(self, state):
+        handle = self.active
+        if handle is None:
+            return
+        finished = []
+        if self.robot.abort_event.is_set():
+            # หยุดกะทันหัน (เช่น ตรวจพบการชน): คำสั่งที่เหลือทั้งหมดล้มเหลว
+            with self._lock:
+                if self.active is not None:
+                    finished.append(self._finish(self.active, FAILED))
+                    self.active = None
+                finished += self._drain(FAILED)
+                self._lock.notify_all()
+        elif at_pose(state, handle.pose, self.tolerance, self.speed_tolerance, self.angle_tolerance):
+            with self._lock:
+                if self.active is handle:
+                    finished.append(self._finish(handle, DONE))
+                    self.active = None
+                    finished += self._start_next()
+                    self._lock.notify_all()
+        self._run_callbacks(finished)
+
+    @staticmethod
+    def _run_callbacks(finished):
+        for handle, callbacks in finished:
+            for callback in callbacks:
+                try:
+                    callback(handle)
+                except Exception as e:
+                    print(f"callback ของ {handle} ผิดพลาด: {e}")
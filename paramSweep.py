@@ -0,0 +1,313 @@
+"""
+ค้นหาค่า a, v, blend radius ของโปรแกรม (เช่นเส้นทาง ex6 หรืองานหยิบ-วาง) แบบ grid หรือสุ่ม
+โดยประเมินแต่ละชุดพร้อมกันใน process pool แล้วคืน Pareto front ของเวลารอบการทำงานกับความเร็วสูงสุด
+หรือความคลาดเคลื่อนจากเส้นทาง เพื่อไม่ต้องเสียเวลาผลิตไปกับการปรับค่าด้วยมือบนแขนกลจริง
+
+ตัวประเมินมีสองแบบ:
+- predict: แบบจำลองความเร็วรูปสี่เหลี่ยมคางหมูเดียวกับ blendRadius (เร็ว ไม่ต้องใช้แขนกล)
+  ถือว่าทุกจุดเป็นการเคลื่อนที่เชิงเส้น จึงไม่มีความเร็วข้อต่อ
+- measure: รันโปรแกรมจริงบน URSim (หรือแขนกล) หนึ่งเครื่องต่อหนึ่ง process แล้ววัดจาก state stream
+"""
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from blendRadius import max_blend_radii, blended_profile
+from ur3Controller import move_command
+
+OBJECTIVES = ("cycle_time", "peak_speed", "peak_joint_speed", "deviation")
+
+
+class Program:
+    def __init__(self, poses, kinds=None, stops=(), dwell=0.0, start=None, name=None):
+        """
+        โปรแกรมที่จะปรับค่า
+
+        Args:
+            poses (list): [x, y, z, rx, ry, rz] ของแต่ละจุด
+            kinds (list): "movel"/"movej" ของแต่ละจุด - None คือ movel ทุกจุด
+            stops (iterable): index ของจุดที่ต้องหยุดเสมอ (เช่นจุดจับ/ปล่อยชิ้นงาน)
+            dwell (float): เวลาที่หยุดรอที่แต่ละจุดใน stops (วินาที) เช่นเวลาเปิด-ปิด gripper
+            start (list): ตำแหน่งเริ่มต้นก่อนจุดแรก - None คือเริ่มที่จุดแรก
+            name (str): ชื่อโปรแกรม
+        """
+        self.poses = [list(p) for p in poses]
+        self.kinds = list(kinds) if kinds is not None else ["movel"] * len(self.poses)
+        self.stops = frozenset(stops)
+        self.dwell = dwell
+        self.start = list(start) if start is not None else None
+        self.name = name
+
+    @classmethod
+    def from_path(cls, path, start=None):
+        """สร้างจาก WaypointPath"""
+        return cls(path.poses, path.kinds, start=start, name=path.name)
+
+    @classmethod
+    def from_tasks(cls, tasks, gripper_time=1.0, start=None):
+        """
+        สร้างจากงานหยิบ-วาง (PickPlaceTask) ตามลำดับเดียวกับ PickPlacePipeline:
+        เหนือจุดหยิบ -> หยิบ -> เหนือจุดหยิบ -> เหนือจุดวาง -> วาง -> เหนือจุดวาง
+        """
+        poses, stops = [], []
+        for task in tasks:
+            for target in (task.pick, task.place):
+                above = list(target)
+                above[2] += task.approach_height
+                stops.append(len(poses) + 1)
+                poses += [above, list(target), above]
+        return cls(poses, stops=stops, dwell=gripper_time, start=start, name="pick-place")
+
+    def __len__(self):
+        return len(self.poses)
+
+
+class SweepResult:
+    __slots__ = ("a", "v", "blend", "cycle_time", "peak_speed", "peak_joint_speed", "deviation", "error")
+
+    def __init__(self, a, v, blend, cycle_time, peak_speed, peak_joint_speed=None, deviation=0.0, error=None):
+        self.a = a
+        self.v = v
+        self.blend = blend
+        self.cycle_time = cycle_time
+        self.peak_speed = peak_speed
+        self.peak_joint_speed = peak_joint_speed
+        self.deviation = deviation
+        self.error = error  # ข้อความเมื่อประเมินชุดค่านี้ไม่สำเร็จ (ค่าอื่นเป็น None)
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"SweepResult(a={self.a:.3f}, v={self.v:.3f}, blend={self.blend:.4f}, error={self.error})"
+        joint = "" if self.peak_joint_speed is None else f", peak_joint_speed={self.peak_joint_speed:.3f}"
+        return (f"SweepResult(a={self.a:.3f}, v={self.v:.3f}, blend={self.blend:.4f}, "
+                f"cycle_time={self.cycle_time:.3f}s, peak_speed={self.peak_speed:.3f}{joint}, "
+                f"deviation={self.deviation * 1000:.2f}mm)")
+
+
+def grid(a, v, blend):
+    """
+    ทุกชุดค่าที่เป็นไปได้
+
+    Args:
+        a, v, blend (iterable): ค่าที่จะลองของแต่ละตัวแปร
+
+    Returns:
+        list: (a, v, blend)
+    """
+    return list(itertools.product(a, v, blend))
+
+
+def linspace(lo, hi, steps):
+    """ค่าห่างเท่ากัน steps ค่าจาก lo ถึง hi"""
+    if steps <= 1:
+        return [lo]
+    return [lo + (hi - lo) * i / (steps - 1) for i in range(steps)]
+
+
+def random_params(n, a, v, blend, seed=None):
+    """
+    สุ่มชุดค่าแบบ uniform
+
+    Args:
+        n (int): จำนวนชุด
+        a, v, blend (tuple): (ต่ำสุด, สูงสุด) ของแต่ละตัวแปร
+        seed (int): seed ของตัวสุ่ม
+
+    Returns:
+        list: (a, v, blend)
+    """
+    rng = random.Random(seed)
+    return [(rng.uniform(*a), rng.uniform(*v), rng.uniform(*blend)) for _ in range(n)]
+
+
+def _radii(program, blend):
+    if blend <= 0:
+        return [0.0] * len(program.poses)
+    # จำกัดด้วยความยาวช่วงที่ติดกัน (ไม่ให้ blend ทับกัน) และไม่เกิน blend ที่กำหนด
+    radii = max_blend_radii(program.poses, None, max_radius=blend, start=program.start)
+    for i in program.stops:
+        radii[i] = 0.0
+    return radii
+
+
+def predict(program, a, v, blend):
+    """
+    ประมาณผลของค่าชุดหนึ่งด้วยแบบจำลองความเร็วรูปสี่เหลี่ยมคางหมูของ blendRadius.blended_profile
+
+    Returns:
+        SweepResult: peak_speed คือความเร็ว TCP สูงสุด (m/s), deviation คือระยะที่ตัดมุมมากที่สุด (เมตร)
+    """
+    cycle, peak, deviation = blended_profile(program.poses, _radii(program, blend), v, a, program.start)
+    return SweepResult(a, v, blend, cycle + program.dwell * len(program.stops), peak, None, deviation)
+
+
+# แขนกลของ process นี้ (สร้างครั้งเดียวใน _connect_worker)
+_robot = None
+
+
+def _connect_worker(hosts, counter):
+    global _robot
+    from ur3Controller import UR3Controller
+    with counter.get_lock():
+        host = hosts[counter.value % len(hosts)]
+        counter.value += 1
+    if isinstance(host, str):
+        host = (host,)
+    ip, port, rt_port = (tuple(host) + (30002, 30003)[len(host) - 1:])[:3]
+    _robot = UR3Controller(ip, port, verbose=False, rt_port=rt_port)
+    if not _robot.connect() or _robot.start_state_stream() is None:
+        raise ConnectionError(f"เชื่อมต่อ {ip} ไม่ได้")
+
+
+def _segment_distance(p, a, b):
+    ab = [b[i] - a[i] for i in range(3)]
+    ap = [p[i] - a[i] for i in range(3)]
+    denom = sum(x * x for x in ab)
+    t = 0.0 if denom == 0 else max(0.0, min(1.0, sum(ab[i] * ap[i] for i in range(3)) / denom))
+    return math.sqrt(sum((ap[i] - t * ab[i]) ** 2 for i in range(3)))
+
+
+def measure(program, a, v, blend, timeout=60.0):
+    """
+    รันโปรแกรมบนแขนกลของ process นี้ (URSim) แล้ววัดผลจาก state stream
+    ใช้ได้เฉพาะใน sweep(..., hosts=[...]) ซึ่งเชื่อมต่อแขนกลให้แต่ละ process
+
+    Returns:
+        SweepResult: peak_joint_speed คือ |qd| สูงสุด (rad/s), deviation คือระยะห่างจากเส้นทางมากที่สุด (เมตร)
+    """
+    robot = _robot
+    start = program.start or program.poses[0]
+    robot.move_to_pose(*start, a=a, v=v)
+    if not robot.wait_for_pose(start, timeout):
+        raise TimeoutError("ไปไม่ถึงจุดเริ่มต้น")
+
+    radii = _radii(program, blend)
+    lines = []
+    for i, (kind, pose) in enumerate(zip(program.kinds, program.poses)):
+        lines.append(move_command(kind, pose, a, v, 0, round(radii[i], 5)))
+        if i in program.stops and program.dwell > 0:
+            lines.append(f"sleep({program.dwell})")
+    polyline = [start] + program.poses
+    peak = [0.0, 0.0, 0.0]
+
+    def sample(state):
+        peak[0] = max(peak[0], math.sqrt(sum(x * x for x in state.tcp_speed[:3])))
+        peak[1] = max(peak[1], max(abs(x) for x in state.qd))
+        p = state.tcp_pose
+        peak[2] = max(peak[2], min(_segment_distance(p, polyline[i], polyline[i + 1])
+                                   for i in range(len(polyline) - 1)))
+
+    robot.state_stream.subscribe(sample)
+    try:
+        t0 = time.perf_counter()
+        robot.send_program(lines, "ur_sweep")
+        if not robot.wait_for_pose(program.poses[-1], timeout):
+            raise TimeoutError("ไปไม่ถึงจุดสุดท้าย")
+        cycle = time.perf_counter() - t0
+    finally:
+        robot.state_stream.unsubscribe(sample)
+    return SweepResult(a, v, blend, cycle, peak[0], peak[1], peak[2])
+
+
+def _evaluate(evaluate, program, params):
+    try:
+        return evaluate(program, *params)
+    except OSError as e:
+        # ชุดค่าที่รันไม่สำเร็จ (เช่น controller ปฏิเสธ blend แล้ว measure หมดเวลา) ไม่ทำให้ทั้ง sweep ล้ม
+        return SweepResult(*params, None, None, None, None, error=str(e) or type(e).__name__)
+
+
+def evaluate_all(program, params, evaluate=predict, workers=None, hosts=None):
+    """
+    ประเมินทุกชุดค่าใน process pool
+
+    Args:
+        program (Program): โปรแกรมที่จะปรับค่า
+        params (list): (a, v, blend) จาก grid() หรือ random_params()
+        evaluate (callable): ตัวประเมินระดับโมดูล (ต้อง pickle ได้) - ค่าเริ่มต้น predict
+        workers (int): จำนวน process - None คือเท่าจำนวน CPU หรือจำนวน hosts
+        hosts (list): URSim ที่ใช้วัดจริง ("ip" หรือ (ip, port, rt_port)) หนึ่งเครื่องต่อหนึ่ง process
+            เมื่อระบุ ค่าเริ่มต้นของ evaluate จะเป็น measure
+
+    Returns:
+        list: SweepResult ตามลำดับของ params (ชุดที่ประเมินไม่สำเร็จมี error)
+    """
+    params = list(params)
+    kwargs = {}
+    if hosts:
+        import multiprocessing
+        if evaluate is predict:
+            evaluate = measure
+        workers = len(hosts)
+        kwargs = {"initializer": _connect_worker, "initargs": (list(hosts), multiprocessing.Value("i", 0))}
+    workers = workers or os.cpu_count() or 1
+    # แบ่งงานเป็นก้อน เพราะ predict เร็วกว่าค่าส่งงานข้าม process มาก
+    chunksize = 1 if hosts else max(1, len(params) // (4 * workers))
+    with ProcessPoolExecutor(workers, **kwargs) as pool:
+        return list(pool.map(partial(_evaluate, evaluate, program), params, chunksize=chunksize))
+
+
+def pareto_front(results, objectives=("cycle_time", "deviation")):
+    """
+    ผลที่ไม่มีผลอื่นดีกว่าหรือเท่ากันในทุก objective (ค่าน้อยกว่าดีกว่า)
+
+    Args:
+        results (iterable): SweepResult
+        objectives (tuple): ชื่อ field จาก OBJECTIVES
+
+    Returns:
+        list: เรียงตาม objective แรก
+
+    Raises:
+        ValueError: ถ้าไม่รู้จัก objective หรือตัวประเมินไม่ได้ให้ค่า objective นั้น
+    """
+    for name in objectives:
+        if name not in OBJECTIVES:
+            raise ValueError(f"ไม่รู้จัก objective {name}")
+    scored = []
+    for r in results:
+        if r.error is not None:
+            continue
+        key = tuple(getattr(r, name) for name in objectives)
+        for name, value in zip(objectives, key):
+            if value is None:
+                raise ValueError(f"ตัวประเมินไม่ได้ให้ค่า {name}")
+        scored.append((key, r))
+    scored.sort(key=lambda item: item[0])
+    front = []
+    for key, result in scored:
+        # ผลที่มาก่อนมีค่า objective แรกไม่มากกว่า จึงตรวจแค่กับผลใน front
+        if not any(all(f <= k for f, k in zip(other, key)) for other, _ in front):
+            front.append((key, result))
+    return [result for _, result in front]
+
+
+def sweep(program, params, objectives=("cycle_time", "deviation"), evaluate=predict, workers=None,
+          hosts=None, failed=None):
+    """
+    ประเมินทุกชุดค่าแล้วคืน Pareto front
+
+    ตัวอย่าง:
+        program = Program.from_path(WaypointPath("ex6", poses, kinds))
+        front = sweep(program, grid(linspace(0.5, 2.0, 8), linspace(0.05, 0.5, 10), linspace(0, 0.05, 6)))
+
+    Args:
+        failed (list): ถ้าระบุ จะเพิ่ม SweepResult ของชุดค่าที่ประเมินไม่สำเร็จลงในลิสต์นี้ (ไม่อยู่ใน front)
+
+    Returns:
+        list: SweepResult บน Pareto front เรียงตาม objective แรก
+
+    Raises:
+        ValueError: ถ้าตัวประเมินให้ค่า objective ที่เลือกไม่ได้ (เช่น peak_joint_speed กับ predict)
+    """
+    if evaluate is predict and not hosts and "peak_joint_speed" in objectives:
+        # ตรวจก่อนเริ่ม process pool: predict ไม่มีแบบจำลองของข้อต่อ
+        raise ValueError("peak_joint_speed วัดได้เฉพาะบน URSim (ระบุ hosts)")
+    results = evaluate_all(program, params, evaluate, workers, hosts)
+    if failed is not None:
+        failed.extend(r for r in results if r.error is not None)
+    return pareto_front(results, objectives)
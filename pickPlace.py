@@ -0,0 +1,230 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import urTrace
+from ur3Controller import move_command, linear_duration, position_distance
+
+_BUSY_DELAY = 0.1   # วินาทีหลังสั่ง rg_grip ก่อนเริ่มอ่าน busy
+_BUSY_POLL = 0.02   # คาบการอ่าน busy ระหว่างรอนิ้วหยุด
+
+
+class PickPlaceTask:
+    def __init__(self, pick, place, name=None, approach_height=0.05, grip_width=10.0,
+                 open_width=100.0, release_width=None, force=40.0):
+        """
+        งานหยิบ-วางหนึ่งชิ้น
+
+        Args:
+            pick (list): [x, y, z, rx, ry, rz] ตำแหน่งหยิบ
+            place (list): [x, y, z, rx, ry, rz] ตำแหน่งวาง
+            name (str): ชื่องาน (แสดงใน trace)
+            approach_height (float): ระยะเหนือจุดหยิบ/วางที่ใช้เป็นจุดเข้า-ออก (เมตร)
+            grip_width (float): ความกว้างตอนจับ (mm)
+            open_width (float): ความกว้างตอนเปิดก่อนจับ (mm)
+            release_width (float): ความกว้างตอนปล่อย (mm) - None คือใช้ open_width
+            force (float): แรงจับ (N)
+        """
+        self.pick = list(pick)
+        self.place = list(place)
+        self.name = name
+        self.approach_height = approach_height
+        self.grip_width = grip_width
+        self.open_width = open_width
+        self.release_width = open_width if release_width is None else release_width
+        self.force = force
+
+
+class PickPlacePlan:
+    """จุดที่คำนวณไว้ล่วงหน้าของงานหนึ่งชิ้น"""
+    __slots__ = ("task", "above_pick", "above_place")
+
+    def __init__(self, task, above_pick, above_place):
+        self.task = task
+        self.above_pick = above_pick
+        self.above_place = above_place
+
+
+class PipelineStats:
+    def __init__(self):
+        self.picks = 0
+        self.elapsed = 0.0
+        self.aborted = False
+        self.blended_approaches = 0
+        self.split_approaches = 0
+
+    @property
+    def picks_per_minute(self):
+        return 60.0 * self.picks / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"PipelineStats(picks={self.picks}, elapsed={self.elapsed:.2f}s, "
+                f"picks_per_minute={self.picks_per_minute:.1f}, aborted={self.aborted})")
+
+
+class PickPlacePipeline:
+    def __init__(self, robot, gripper, a=1.2, v=0.25, blend=0.02, tolerance=0.002,
+                 gripper_open_time=1.0, settle=0.0, planner=None, gripper_motion_time=None,
+                 gripper_timeout=5.0):
+        """
+        ทำงานหยิบ-วางต่อเนื่องโดยจัดลำดับล่วงหน้า:
+        - เปิด gripper พร้อมกับช่วงเคลื่อนที่เข้าหาชิ้นงาน
+        - ส่งจุดที่ไม่ต้องหยุด (เหนือจุดหยิบ/วาง) เป็นโปรแกรมเดียวพร้อม blend radius
+        - คำนวณงานชิ้นถัดไปใน background ระหว่างที่กำลังวางชิ้นปัจจุบัน
+
+        Args:
+            robot (UR3Controller): แขนกลที่เชื่อมต่อแล้ว (ควรเปิด state stream เพื่อรอแบบแม่นยำ)
+            gripper (RG2): gripper
+            a (float): ความเร่ง (m/s^2)
+            v (float): ความเร็ว (m/s)
+            blend (float): blend radius ที่จุดผ่าน (เมตร)
+            tolerance (float): ระยะที่ถือว่าถึงเป้าหมาย (เมตร)
+            gripper_open_time (float): เวลาเปิด gripper โดยประมาณตอนเริ่ม (วินาที) จะปรับตามที่วัดได้จริง
+            settle (float): เวลารอหลังจับ/ปล่อย ก่อนเคลื่อนที่ต่อ (วินาที)
+            planner (callable): รับ PickPlaceTask คืน PickPlaceTask ที่ปรับแล้ว (เช่น อ่านตำแหน่งจากกล้อง)
+                ถูกเรียกใน background ระหว่างงานก่อนหน้า - None คือใช้งานตามที่ส่งมา
+            gripper_motion_time (float): เวลาที่นิ้วของ gripper ใช้เคลื่อนที่จริง (วินาที)
+                - None คืออ่าน get_rg_busy() จนกว่านิ้วจะหยุด (rg_grip คืนค่าก่อนนิ้วหยุด)
+            gripper_timeout (float): เวลารอนิ้วหยุดสูงสุด (วินาที)
+        """
+        self.robot = robot
+        self.gripper = gripper
+        self.a = a
+        self.v = v
+        self.blend = blend
+        self.tolerance = tolerance
+        self.gripper_open_time = gripper_open_time
+        self.settle = settle
+        self.planner = planner
+        self.gripper_motion_time = gripper_motion_time
+        self.gripper_timeout = gripper_timeout
+        self._last_target = None
+
+    def plan(self, task):
+        """คำนวณจุดเข้า-ออกของงานหนึ่งชิ้น (ถูกเรียกใน background)"""
+        with urTrace.span("plan", "pipeline", {"task": task.name}):
+            if self.planner is not None:
+                task = self.planner(task)
+            above_pick = list(task.pick)
+            above_pick[2] += task.approach_height
+            above_place = list(task.place)
+            above_place[2] += task.approach_height
+            return PickPlacePlan(task, above_pick, above_place)
+
+    def run(self, tasks):
+        """
+        ทำงานทั้งหมดตามลำดับ
+
+        Args:
+            tasks (iterable): PickPlaceTask
+
+        Returns:
+            PipelineStats: จำนวนชิ้นและอัตราต่อนาที
+        """
+        stats = PipelineStats()
+        tasks = iter(tasks)
+        first = next(tasks, None)
+        if first is None:
+            return stats
+
+        start = time.perf_counter()
+        self._last_target = self.robot.get_current_pose()
+        # planner และ gripper ใช้ thread แยกกันเพื่อไม่ให้รอกันเอง
+        with ThreadPoolExecutor(1, "pp-plan") as planner, ThreadPoolExecutor(1, "pp-gripper") as gripper:
+            plan_future = planner.submit(self.plan, first)
+            retract = None
+            while plan_future is not None:
+                plan = plan_future.result()
+                task = plan.task
+                following = next(tasks, None)
+                with urTrace.span(task.name or f"pick {stats.picks + 1}", "pipeline"):
+                    # approach + pre-grip open (เปิด gripper ระหว่างที่แขนกำลังเคลื่อนที่)
+                    open_future = gripper.submit(self._grip, task.open_width, task.force, True)
+                    if not self._approach(plan, retract, open_future, stats):
+                        stats.aborted = True
+                        break
+                    open_future.result()
+
+                    # grip
+                    self._grip(task.grip_width, task.force)
+
+                    # วางแผนชิ้นถัดไประหว่างที่วางชิ้นนี้
+                    plan_future = planner.submit(self.plan, following) if following is not None else None
+
+                    # retract -> transfer -> descend ในโปรแกรมเดียว
+                    if not self._move([plan.above_pick, plan.above_place, task.place], "transfer"):
+                        stats.aborted = True
+                        break
+
+                    # release
+                    self._grip(task.release_width, task.force)
+                    retract = plan.above_place
+                stats.picks += 1
+
+            if retract is not None and not stats.aborted:
+                self._move([retract], "retract")
+        stats.elapsed = time.perf_counter() - start
+        print(f"หยิบ-วางเสร็จ {stats.picks} ชิ้น ใน {stats.elapsed:.1f} วินาที "
+              f"({stats.picks_per_minute:.1f} ชิ้น/นาที)")
+        return stats
+
+    def _approach(self, plan, retract, open_future, stats):
+        points = ([retract] if retract is not None else []) + [plan.above_pick]
+        # ถ้า gripper น่าจะเปิดเสร็จก่อนถึงจุดเหนือชิ้นงาน ส่งทั้งช่วงเป็นโปรแกรมเดียวแบบ blend
+        if open_future.done() or self._duration(points) >= self.gripper_open_time:
+            stats.blended_approaches += 1
+            return self._move(points + [plan.task.pick], "approach")
+        # ไม่ทัน: หยุดที่จุดเหนือชิ้นงาน รอ gripper แล้วค่อยลง
+        stats.split_approaches += 1
+        if not self._move(points, "approach"):
+            return False
+        open_future.result()
+        return self._move([plan.task.pick], "descend")
+
+    def _move(self, points, name):
+        lines = []
+        for i, pose in enumerate(points):
+            r = self.blend if i < len(points) - 1 else 0
+            lines.append(move_command("movel", pose, self.a, self.v, 0, r))
+        if not self.robot.send_program(lines, name):
+            return False
+        timeout = 2.0 * self._duration(points) + 2.0
+        self._last_target = points[-1]
+        return self.robot.wait_for_pose(points[-1], timeout, self.tolerance)
+
+    def _duration(self, points):
+        previous = self._last_target
+        total = 0.0
+        for pose in points:
+            if previous is not None:
+                total += linear_duration(position_distance(previous, pose), self.v, self.a)
+            previous = pose
+        return total
+
+    def _grip(self, width, force, opening=False):
+        t0 = time.perf_counter()
+        self.gripper.rg_grip(width, force)
+        self._wait_gripper(t0)
+        if opening:
+            # ปรับค่าประมาณเวลาเปิด gripper จากเวลาที่นิ้วหยุดจริง (ไม่ใช่เวลาของคำสั่ง XML-RPC)
+            self.gripper_open_time = 0.7 * self.gripper_open_time + 0.3 * (time.perf_counter() - t0)
+        elif self.settle:
+            urTrace.sleep(self.settle, "settle")
+
+    def _wait_gripper(self, t0):
+        with urTrace.span("gripper_motion", "pipeline"):
+            if self.gripper_motion_time is not None:
+                urTrace.sleep(max(0.0, t0 + self.gripper_motion_time - time.perf_counter()), "gripper")
+                return
+            # flag busy ขึ้นช้ากว่าคำสั่งเล็กน้อย จึงไม่เชื่อค่า False ที่อ่านได้ทันทีหลังสั่ง
+            deadline = t0 + self.gripper_timeout
+            time.sleep(_BUSY_DELAY)
+            while time.perf_counter() < deadline:
+                busy = self.gripper.get_rg_busy()
+                if busy is None:
+                    # อ่านสถานะไม่ได้ (เช่น cache ที่ไม่ได้อ่าน busy) ใช้เวลาที่ประมาณไว้แทน
+                    urTrace.sleep(max(0.0, t0 + self.gripper_open_time - time.perf_counter()), "gripper")
+                    return
+                if not busy:
+                    return
+                time.sleep(_BUSY_POLL)
+            print(f"gripper ยังไม่หยุดหลังจาก {self.gripper_timeout:.1f} วินาที")
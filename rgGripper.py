@@ -1,26 +1,32 @@
 import pycurl
 from io import BytesIO
 import xmlrpc.client
+
+import urMetrics
+import urTrace
+
 class RG2:
-    def __init__(self, robot_ip, rg_id):
+    def __init__(self, robot_ip, rg_id, verbose=True):
         self.rg_id = rg_id
         self.robot_ip = robot_ip
+        self.verbose = verbose
+        self._grip_listeners = []
 
-    def get_rg_width(self):
-        xml_request = f"""<?xml version="1.0"?>
-    <methodCall>
-        <methodName>rg_get_width</methodName>
-            <params>
-                <param>
-                    <value><int>{self.rg_id}</int></value>
-                </param>
-            </params>
-    </methodCall>"""
+    def on_grip(self, callback):
+        """
+        ลงทะเบียนฟังก์ชันที่ถูกเรียกก่อนส่ง rg_grip และอีกครั้งเมื่อ rg_grip เสร็จ
+        (เช่น GripperStateCache ใช้ล้างค่าที่เก็บไว้)
+        """
+        self._grip_listeners.append(callback)
 
+    def remove_grip_listener(self, callback):
+        self._grip_listeners.remove(callback)
+
+    def _post(self, xml_request, method):
         headers = ["Content-Type: application/x-www-form-urlencoded"]
 
+        # headers = ["User-Agent: Python-PycURL", "Accept: application/json"]
         data = xml_request.replace('\r\n','').encode()
-
         # Create a new cURL object
         curl = pycurl.Curl()
 
@@ -32,19 +38,42 @@ class RG2:
         buffer = BytesIO()
         curl.setopt(curl.WRITEDATA, buffer)
 
-        # Perform the request
-        curl.perform()
+        # Perform the request and time the full XML-RPC round trip
+        t0 = urMetrics.start()
+        urTrace.begin(method, "gripper")
+        try:
+            curl.perform()
+        except pycurl.error:
+            urMetrics.inc("rg_xmlrpc_errors_total")
+            raise
+        finally:
+            # Close the cURL object
+            curl.close()
+            urTrace.end(method, "gripper")
+        urMetrics.observe("rg_xmlrpc_seconds", t0)
 
         # Get the response body
-        response = buffer.getvalue()
+        response = buffer.getvalue().decode('utf-8')
 
         # Print the response
-        print(response.decode('utf-8'))
+        if self.verbose:
+            print(response)
+        return response
+
+    def get_rg_width(self):
+        xml_request = f"""<?xml version="1.0"?>
+    <methodCall>
+        <methodName>rg_get_width</methodName>
+            <params>
+                <param>
+                    <value><int>{self.rg_id}</int></value>
+                </param>
+            </params>
+    </methodCall>"""
 
-        # Close the cURL object
-        curl.close()
+        response = self._post(xml_request, "rg_get_width")
 
-        xml_response = xmlrpc.client.loads(response.decode('utf-8'))
+        xml_response = xmlrpc.client.loads(response)
         rg_width = float(xml_response[0][0])
         #print(rg_width)
         return rg_width
@@ -80,29 +109,23 @@ class RG2:
         </params>
     </methodCall>"""
 
-        headers = ["Content-Type: application/x-www-form-urlencoded"]
-
-        # headers = ["User-Agent: Python-PycURL", "Accept: application/json"]
-        data = xml_request.replace('\r\n','').encode()
-        # Create a new cURL object
-        curl = pycurl.Curl()
-
-        # Set the URL to fetch
-        curl.setopt(curl.URL, f'http://{self.robot_ip}:41414')
-        curl.setopt(curl.HTTPHEADER, headers)
-        curl.setopt(curl.POSTFIELDS, data)
-        # Create a BytesIO object to store the response
-        buffer = BytesIO()
-        curl.setopt(curl.WRITEDATA, buffer)
-
-        # Perform the request
-        curl.perform()
-
-        # Get the response body
-        response = buffer.getvalue()
-
-        # Print the response
-        print(response.decode('utf-8'))
-
-        # Close the cURL object
-        curl.close()
\ No newline at end of file
+        for callback in self._grip_listeners:
+            callback()
+        try:
+            self._post(xml_request, "rg_grip")
+        finally:
+            for callback in self._grip_listeners:
+                callback()
+
+    def _call(self, method):
+        # คำสั่งอ่านค่าที่มีพารามิเตอร์เดียวคือ id ของ gripper
+        response = self._post(xmlrpc.client.dumps((self.rg_id,), method), method)
+        return xmlrpc.client.loads(response)[0][0]
+
+    def get_rg_busy(self):
+        """True ถ้า gripper กำลังเคลื่อนที่"""
+        return bool(self._call("rg_get_busy"))
+
+    def get_rg_grip_detected(self):
+        """True ถ้าจับชิ้นงานได้"""
+        return bool(self._call("rg_get_grip_detected"))
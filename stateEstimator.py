@@ -0,0 +1,249 @@
+"""
+ประมาณสถานะของแขนกล ณ เวลาปัจจุบันหรือเวลาในอนาคต (เช่นเวลาที่คำสั่งถัดไปจะถึง controller)
+
+ข้อมูลจาก state stream ล่าช้าเสมอ: เวลาส่งผ่านเครือข่ายบวกคาบของ packet (2 ms ที่ 500 Hz, 8 ms ที่ 125 Hz)
+StateEstimator ใช้เวลาของ controller ใน packet เพื่อรู้ว่าข้อมูลถูกวัดเมื่อไร แล้วต่อค่า q, qd
+และตำแหน่ง/ความเร็ว TCP ด้วยแบบจำลองความเร่งคงที่ (ความเร่งได้จากความเร็วที่วัดได้แล้วกรองด้วย
+exponential smoothing)
+TargetPredictor ใช้แบบจำลองเดียวกันกับเป้าหมายที่เห็นจากกล้อง (เช่นชิ้นงานบนสายพาน)
+"""
+import math
+import threading
+import time
+
+
+class EstimatedState:
+    """สถานะที่ประมาณไว้ ณ เวลา time (perf_counter) horizon คือระยะเวลาที่ต่อจากข้อมูลจริงล่าสุด"""
+    __slots__ = ("time", "q", "qd", "tcp_pose", "tcp_speed", "horizon")
+
+    def __init__(self, time, q, qd, tcp_pose, tcp_speed, horizon):
+        self.time = time
+        self.q = q
+        self.qd = qd
+        self.tcp_pose = tcp_pose
+        self.tcp_speed = tcp_speed
+        self.horizon = horizon
+
+    def __repr__(self):
+        return (f"EstimatedState(horizon={self.horizon * 1000:.1f}ms, "
+                f"tcp={[round(v, 4) for v in self.tcp_pose]})")
+
+
+def _quat(rotvec):
+    angle = math.sqrt(sum(v * v for v in rotvec))
+    if angle < 1e-12:
+        return (1.0, 0.5 * rotvec[0], 0.5 * rotvec[1], 0.5 * rotvec[2])
+    s = math.sin(angle / 2) / angle
+    return (math.cos(angle / 2), rotvec[0] * s, rotvec[1] * s, rotvec[2] * s)
+
+
+def _quat_mul(a, b):
+    return (a[0] * b[0] - a[1] * b[1] - a[2] * b[2] - a[3] * b[3],
+            a[0] * b[1] + a[1] * b[0] + a[2] * b[3] - a[3] * b[2],
+            a[0] * b[2] - a[1] * b[3] + a[2] * b[0] + a[3] * b[1],
+            a[0] * b[3] + a[1] * b[2] - a[2] * b[1] + a[3] * b[0])
+
+
+def _rotvec(q):
+    if q[0] < 0:
+        q = tuple(-v for v in q)
+    norm = math.sqrt(q[1] * q[1] + q[2] * q[2] + q[3] * q[3])
+    if norm < 1e-12:
+        return (2 * q[1], 2 * q[2], 2 * q[3])
+    scale = 2 * math.atan2(norm, q[0]) / norm
+    return (q[1] * scale, q[2] * scale, q[3] * scale)
+
+
+def rotate(rotvec, omega, dt):
+    """
+    หมุน orientation (rotation vector) ด้วยความเร็วเชิงมุม omega (rad/s ในพิกัดฐาน) เป็นเวลา dt
+
+    Returns:
+        tuple: rotation vector ใหม่ (มุม 0 ถึง pi)
+    """
+    return _rotvec(_quat_mul(_quat([w * dt for w in omega]), _quat(rotvec)))
+
+
+def _extrapolate(p, v, a, h):
+    return tuple(p[i] + v[i] * h + 0.5 * a[i] * h * h for i in range(len(p)))
+
+
+def _velocity(v, a, h):
+    return tuple(v[i] + a[i] * h for i in range(len(v)))
+
+
+class StateEstimator:
+    def __init__(self, stream=None, transport_delay=0.0, smoothing=0.2, max_horizon=0.1):
+        """
+        Args:
+            stream (StateStream): state stream ที่จะติดตาม (None คือป้อนข้อมูลเองด้วย update())
+            transport_delay (float): เวลาส่งผ่านเครือข่ายขั้นต่ำ (วินาที) วัดไม่ได้จากข้อมูล
+                ส่วนที่ช้ากว่าขั้นต่ำ (jitter) ถูกชดเชยจากเวลาของ controller เอง
+            smoothing (float): น้ำหนักของค่าความเร่งใหม่ (0-1) ค่าน้อยคือเรียบแต่ตอบสนองช้า
+            max_horizon (float): ต่อค่าไปข้างหน้าได้ไม่เกินนี้ (วินาที) เพื่อไม่ให้ความเร่งทำให้ค่าเพี้ยน
+        """
+        self.stream = stream
+        self.transport_delay = transport_delay
+        self.smoothing = smoothing
+        self.max_horizon = max_horizon
+        self._offset = None  # perf_counter - เวลาของ controller (ค่าต่ำสุดที่เคยเห็น)
+        self._last = None
+        self._qdd = (0.0,) * 6
+        self._tcp_acc = (0.0,) * 6
+        self._lock = threading.Lock()
+
+    def start(self):
+        """เริ่มรับข้อมูลจาก stream"""
+        self.stream.subscribe(self.update)
+        return self
+
+    def stop(self):
+        self.stream.unsubscribe(self.update)
+
+    def update(self, state):
+        """ป้อน RealtimeState ใหม่ (ถูกเรียกเองเมื่อ start() กับ stream)"""
+        # packet ที่มาถึงเร็วที่สุดบอกความต่างของนาฬิกาสองฝั่งได้แม่นที่สุด
+        # ยอมให้ค่าเพิ่มขึ้นช้า ๆ (10 us/s) เพื่อตามนาฬิกาที่เดินไม่เท่ากัน
+        offset = state.received - state.timestamp
+        with self._lock:
+            last = self._last
+            if self._offset is None or last is None or state.timestamp <= last.timestamp:
+                self._offset = offset
+                self._qdd = (0.0,) * 6
+                self._tcp_acc = (0.0,) * 6
+            else:
+                dt = state.timestamp - last.timestamp
+                self._offset = min(self._offset + 1e-5 * dt, offset)
+                k = self.smoothing
+                self._qdd = tuple(a + k * ((v - v0) / dt - a)
+                                  for a, v, v0 in zip(self._qdd, state.qd, last.qd))
+                self._tcp_acc = tuple(a + k * ((v - v0) / dt - a)
+                                      for a, v, v0 in zip(self._tcp_acc, state.tcp_speed, last.tcp_speed))
+            self._last = state
+
+    def sample_time(self):
+        """เวลา (perf_counter) ที่ข้อมูลล่าสุดถูกวัดจริง หรือ None ถ้ายังไม่มีข้อมูล"""
+        last = self._last
+        if last is None:
+            return None
+        return last.timestamp + self._offset - self.transport_delay
+
+    def latency(self):
+        """ข้อมูลล่าสุดเก่าแค่ไหนเมื่อเทียบกับตอนนี้ (วินาที)"""
+        t = self.sample_time()
+        return None if t is None else time.perf_counter() - t
+
+    def predict(self, at=None, lead=0.0):
+        """
+        ประมาณสถานะ ณ เวลาที่กำหนด
+
+        Args:
+            at (float): เวลา perf_counter ที่ต้องการ - None คือตอนนี้
+            lead (float): บวกเวลาเพิ่ม (วินาที) เช่นเวลาที่คำสั่งใช้เดินทางไปถึง controller
+
+        Returns:
+            EstimatedState: หรือ None ถ้ายังไม่มีข้อมูล
+        """
+        with self._lock:
+            last = self._last
+            if last is None:
+                return None
+            sampled = last.timestamp + self._offset - self.transport_delay
+            qdd, acc = self._qdd, self._tcp_acc
+        at = (time.perf_counter() if at is None else at) + lead
+        h = max(0.0, min(at - sampled, self.max_horizon))
+        q = _extrapolate(last.q, last.qd, qdd, h)
+        qd = _velocity(last.qd, qdd, h)
+        speed = _velocity(last.tcp_speed, acc, h)
+        position = _extrapolate(last.tcp_pose[:3], last.tcp_speed[:3], acc[:3], h)
+        # ความเร็วเชิงมุมเฉลี่ยในช่วง h (ความเร่งเชิงมุมคงที่)
+        omega = [w + 0.5 * a * h for w, a in zip(last.tcp_speed[3:], acc[3:])]
+        pose = position + rotate(last.tcp_pose[3:], omega, h)
+        return EstimatedState(at, q, qd, pose, speed, h)
+
+    def predict_pose(self, at=None, lead=0.0):
+        """ตำแหน่ง TCP [x, y, z, rx, ry, rz] ที่ประมาณไว้ หรือ None ถ้ายังไม่มีข้อมูล"""
+        state = self.predict(at, lead)
+        return None if state is None else list(state.tcp_pose)
+
+
+class TargetPredictor:
+    def __init__(self, smoothing=0.5, velocity_smoothing=0.3, acceleration_smoothing=0.0, max_horizon=2.0):
+        """
+        ติดตามเป้าหมายที่เคลื่อนที่ (เช่นชิ้นงานบนสายพาน) จากตำแหน่งที่วัดได้เป็นช่วง ๆ
+        แล้วประมาณตำแหน่ง ณ เวลาในอนาคต (alpha-beta-gamma filter ของแต่ละแกน)
+
+        Args:
+            smoothing (float): alpha - น้ำหนักของตำแหน่งที่วัดได้ใหม่ (0-1)
+            velocity_smoothing (float): beta - น้ำหนักของการแก้ความเร็วจากความคลาดเคลื่อน
+            acceleration_smoothing (float): gamma - 0 คือความเร็วคงที่ (เหมาะกับสายพาน)
+            max_horizon (float): ต่อค่าไปข้างหน้าได้ไม่เกินนี้ (วินาที)
+        """
+        self.alpha = smoothing
+        self.beta = velocity_smoothing
+        self.gamma = acceleration_smoothing
+        self.max_horizon = max_horizon
+        self.position = None
+        self.velocity = (0.0, 0.0, 0.0)
+        self.acceleration = (0.0, 0.0, 0.0)
+        self.orientation = None
+        self.updated = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.position = None
+            self.velocity = (0.0, 0.0, 0.0)
+            self.acceleration = (0.0, 0.0, 0.0)
+            self.updated = None
+
+    def observe(self, pose, t=None):
+        """
+        ป้อนตำแหน่งที่วัดได้
+
+        Args:
+            pose (list): [x, y, z] หรือ [x, y, z, rx, ry, rz] ในพิกัดฐาน
+            t (float): เวลา perf_counter ที่วัด (เช่นเวลาที่ถ่ายภาพ) - None คือตอนนี้
+                ค่าที่เก่ากว่าค่าล่าสุดที่ได้รับจะถูกข้าม
+        """
+        t = time.perf_counter() if t is None else t
+        measured = tuple(pose[:3])
+        with self._lock:
+            if self.position is not None and t < self.updated:
+                # ภาพที่มาช้าหรือสลับลำดับ: เก่ากว่าค่าที่ใช้อยู่แล้ว จึงไม่ใช้
+                return
+            if len(pose) >= 6:
+                self.orientation = tuple(pose[3:6])
+            if self.position is None or t == self.updated:
+                self.position = measured
+                self.updated = t
+                return
+            dt = t - self.updated
+            predicted = _extrapolate(self.position, self.velocity, self.acceleration, dt)
+            velocity = _velocity(self.velocity, self.acceleration, dt)
+            residual = [m - p for m, p in zip(measured, predicted)]
+            self.position = tuple(p + self.alpha * r for p, r in zip(predicted, residual))
+            self.velocity = tuple(v + self.beta * r / dt for v, r in zip(velocity, residual))
+            self.acceleration = tuple(a + self.gamma * 2 * r / (dt * dt)
+                                      for a, r in zip(self.acceleration, residual))
+            self.updated = t
+
+    def predict(self, at=None, lead=0.0):
+        """
+        ตำแหน่งของเป้าหมาย ณ เวลาที่กำหนด
+
+        Args:
+            at (float): เวลา perf_counter - None คือตอนนี้
+            lead (float): บวกเวลาเพิ่ม (วินาที) เช่นเวลาที่แขนกลใช้เคลื่อนที่ไปถึง
+
+        Returns:
+            list: [x, y, z] หรือ [x, y, z, rx, ry, rz] ถ้าเคยได้รับ orientation - None ถ้ายังไม่มีข้อมูล
+        """
+        with self._lock:
+            if self.position is None:
+                return None
+            at = (time.perf_counter() if at is None else at) + lead
+            h = max(0.0, min(at - self.updated, self.max_horizon))
+            position = list(_extrapolate(self.position, self.velocity, self.acceleration, h))
+            orientation = self.orientation
+        return position + list(orientation) if orientation is not None else position
@@ -0,0 +1,311 @@
+"""
+คลังข้อมูลสถานะแขนกลระยะยาว (หลายกะ หลายเดือน)
+
+- ข้อมูลแต่ละชั่วโมง (UTC) อยู่ในไฟล์ของตัวเอง ชื่อ YYYYMMDD-HH.urta
+- แต่ละไฟล์เป็นก้อน (chunk) ต่อกัน แต่ละก้อนมี header 32 ไบต์บอกช่วงเวลา จึงอ่านเฉพาะก้อนที่อยู่ในช่วงที่ขอ
+- ค่า q, qd, pose ถูกปัดเป็นจำนวนเต็ม (ความละเอียดตาม SCALES) แล้วเก็บเป็นผลต่างจากตัวก่อนหน้า
+  เรียงทีละคอลัมน์ก่อนบีบอัดด้วย zlib ข้อมูลที่เปลี่ยนช้าจึงบีบอัดได้มาก
+- compact() ลดความถี่ของข้อมูลเก่าตาม DOWNSAMPLE (เช่นเก่ากว่าหนึ่งวันเหลือ 10 Hz)
+  ถูกเรียกเองบน thread ที่เขียนไฟล์ทุกครั้งที่ข้อมูลขึ้นชั่วโมงใหม่ (ปิดได้ด้วย auto_compact=False)
+
+    python telemetryArchive.py info คลัง/
+    python telemetryArchive.py export คลัง/ ผล.csv [เริ่ม] [จบ]     # เวลาแบบ unix timestamp
+    python telemetryArchive.py compact คลัง/
+"""
+import calendar
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from itertools import accumulate
+from concurrent.futures import ThreadPoolExecutor
+
+MAGIC = b"URTC"
+SUFFIX = ".urta"
+
+# magic, คาบของข้อมูล (ms, 0 คือไม่ได้ลดความถี่), version, จำนวนแถว, เวลาแถวแรก, เวลาแถวสุดท้าย, ขนาดข้อมูล
+_CHUNK = struct.Struct("<4sHHIddI")
+# version 2: คอลัมน์เวลาเป็น int64 (version 1 เป็น int32 ซึ่งล้นเมื่อแถวในก้อนเดียวกันห่างกันเกิน ~35 นาที)
+VERSION = 2
+
+# จำนวนหน่วยย่อยต่อหน่วย: q 1e-5 rad, qd 1e-4 rad/s, x y z 10 ไมโครเมตร, rx ry rz 1e-5 rad
+SCALES = (100000,) * 6 + (10000,) * 6 + (100000,) * 6
+_TIME_SCALE = 1000000  # เวลาเก็บเป็นไมโครวินาทีนับจากแถวแรกของก้อน
+
+# (อายุ วินาที, คาบ วินาที): ข้อมูลที่เก่ากว่าอายุนี้จะถูกลดความถี่เหลือคาบนี้
+DOWNSAMPLE = ((24 * 3600, 0.1), (7 * 24 * 3600, 1.0))
+
+
+def _hour_name(t):
+    return time.strftime("%Y%m%d-%H", time.gmtime(t)) + SUFFIX
+
+
+def _hour_start(name):
+    return float(calendar.timegm(time.strptime(name[:-len(SUFFIX)], "%Y%m%d-%H")))
+
+
+def _deltas(values, typecode='i'):
+    return array(typecode, [b - a for a, b in zip([0] + values, values)])
+
+
+def _encode(rows):
+    # rows: [(t, values 18 ค่า)] -> bytes ที่บีบอัดแล้ว
+    t0 = rows[0][0]
+    columns = [_deltas([round((t - t0) * _TIME_SCALE) for t, _ in rows], 'q')]
+    for c, s in enumerate(SCALES):
+        columns.append(_deltas([round(values[c] * s) for _, values in rows]))
+    if sys.byteorder != "little":
+        for column in columns:
+            column.byteswap()
+    return zlib.compress(b"".join(column.tobytes() for column in columns))
+
+
+def _decode(payload, count, t0, version=VERSION):
+    raw = zlib.decompress(payload)
+    times = array('q' if version >= 2 else 'i')
+    data = array('i')
+    split = count * times.itemsize
+    times.frombytes(raw[:split])
+    data.frombytes(raw[split:])
+    if sys.byteorder != "little":
+        times.byteswap()
+        data.byteswap()
+    columns = [accumulate(data[c * count:(c + 1) * count]) for c in range(len(SCALES))]
+    times = [t0 + v / _TIME_SCALE for v in accumulate(times)]
+    scaled = [[v / s for v in column] for column, s in zip(columns, SCALES)]
+    return list(zip(times, zip(*scaled)))
+
+
+class TelemetryArchive:
+    def __init__(self, directory, chunk_size=2500, downsample=DOWNSAMPLE, auto_compact=True):
+        """
+        เปิด (หรือสร้าง) คลังข้อมูลในไดเรกทอรี
+
+        Args:
+            directory (str): ไดเรกทอรีของคลัง
+            chunk_size (int): จำนวนแถวต่อก้อน (2500 แถว = 5 วินาทีที่ 500 Hz)
+            downsample (tuple): ตารางการลดความถี่ของข้อมูลเก่า ดู DOWNSAMPLE
+            auto_compact (bool): ลดความถี่ของข้อมูลเก่าเองเมื่อข้อมูลขึ้นชั่วโมงใหม่
+        """
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.downsample = downsample
+        self.auto_compact = auto_compact
+        os.makedirs(directory, exist_ok=True)
+        self._rows = []
+        self._hour = None
+        self._stream = None
+        # บีบอัดและเขียนไฟล์บน thread แยก เพื่อไม่ให้ thread ที่อ่าน state stream ช้าลง
+        self._writer = ThreadPoolExecutor(1, "archive-writer")
+        self._index = {}
+
+    def append(self, t, q, qd, pose):
+        """
+        เพิ่มข้อมูลหนึ่งแถว
+
+        Args:
+            t (float): เวลา (unix timestamp)
+            q, qd, pose: ค่าละ 6 ตัว
+        """
+        hour = int(t // 3600)
+        if hour != self._hour:
+            if self._rows:
+                self.flush()
+            if self.auto_compact and self._hour is not None:
+                # ไฟล์ของชั่วโมงที่ผ่านไปแล้วอาจถึงอายุที่ต้องลดความถี่ ทำต่อจากก้อนที่รอเขียนบน thread เดียวกัน
+                self._writer.submit(self._compact, t).add_done_callback(self._check_write)
+        self._hour = hour
+        self._rows.append((t, tuple(q) + tuple(qd) + tuple(pose)))
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """เขียนข้อมูลที่ค้างอยู่ลงไฟล์"""
+        if self._rows:
+            rows, self._rows = self._rows, []
+            future = self._writer.submit(self._write_chunk, os.path.join(self.directory, _hour_name(rows[0][0])),
+                                         rows, 0)
+            future.add_done_callback(self._check_write)
+
+    @staticmethod
+    def _check_write(future):
+        # ข้อผิดพลาดบน thread ที่เขียนไฟล์จะไม่มีใครเห็นถ้าไม่พิมพ์ออกมา
+        error = future.exception()
+        if error is not None:
+            print(f"เขียนคลังข้อมูลไม่สำเร็จ: {error!r}")
+
+    def _write_chunk(self, filename, rows, period_ms, mode="ab"):
+        payload = _encode(rows)
+        with open(filename, mode) as f:
+            f.write(_CHUNK.pack(MAGIC, period_ms, VERSION, len(rows), rows[0][0], rows[-1][0], len(payload)))
+            f.write(payload)
+        self._index.pop(filename, None)
+
+    def record(self, stream):
+        """บันทึกทุก packet จาก StateStream จนกว่าจะเรียก stop_recording()"""
+        self._stream = stream
+        stream.subscribe(self._on_state)
+
+    def stop_recording(self):
+        if self._stream is not None:
+            self._stream.unsubscribe(self._on_state)
+            self._stream = None
+        self.flush()
+
+    def _on_state(self, state):
+        self.append(time.time(), state.q, state.qd, state.tcp_pose)
+
+    def close(self):
+        self.stop_recording()
+        self._writer.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def files(self):
+        """ไฟล์ทั้งหมดของคลัง เรียงตามเวลา"""
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(SUFFIX))
+
+    def _chunks(self, filename):
+        # อ่านเฉพาะ header ของแต่ละก้อน (ข้ามข้อมูลที่บีบอัดไว้) และเก็บไว้จนกว่าไฟล์จะเปลี่ยน
+        stat = os.stat(filename)
+        cached = self._index.get(filename)
+        if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            return cached[1]
+        chunks = []
+        with open(filename, "rb") as f:
+            offset = 0
+            while offset + _CHUNK.size <= stat.st_size:
+                f.seek(offset)
+                magic, period, version, count, first, last, length = _CHUNK.unpack(f.read(_CHUNK.size))
+                if magic != MAGIC or version > VERSION:
+                    raise ValueError(f"{filename}: ข้อมูลเสียที่ตำแหน่ง {offset}")
+                chunks.append((first, last, count, period, offset + _CHUNK.size, length, version))
+                offset += _CHUNK.size + length
+        self._index[filename] = ((stat.st_size, stat.st_mtime_ns), chunks)
+        return chunks
+
+    def query(self, start=None, end=None):
+        """
+        อ่านข้อมูลในช่วงเวลา (คลายการบีบอัดเฉพาะก้อนที่อยู่ในช่วง)
+
+        Args:
+            start (float): เวลาเริ่ม (unix timestamp) - None คือตั้งแต่ต้น
+            end (float): เวลาจบ - None คือจนถึงล่าสุด
+
+        Yields:
+            tuple: (t, q, qd, pose)
+        """
+        self._writer.submit(lambda: None).result()  # รอให้ก้อนที่ส่งไปเขียนเสร็จก่อน
+        lo = -float("inf") if start is None else start
+        hi = float("inf") if end is None else end
+        for name in self.files():
+            hour = _hour_start(name)
+            if hour + 3600 <= lo or hour > hi:
+                continue
+            filename = os.path.join(self.directory, name)
+            with open(filename, "rb") as f:
+                for first, last, count, _, offset, length, version in self._chunks(filename):
+                    if last < lo or first > hi:
+                        continue
+                    f.seek(offset)
+                    for t, values in _decode(f.read(length), count, first, version):
+                        if lo <= t <= hi:
+                            yield t, values[0:6], values[6:12], values[12:18]
+
+    def compact(self, now=None):
+        """
+        ลดความถี่ของข้อมูลเก่าตาม downsample (เขียนไฟล์ใหม่แทนที่ไฟล์เดิม)
+
+        Returns:
+            int: จำนวนไฟล์ที่ถูกเขียนใหม่
+        """
+        self._writer.submit(lambda: None).result()
+        return self._compact(time.time() if now is None else now)
+
+    def _compact(self, now):
+        rewritten = 0
+        for name in self.files():
+            age = now - (_hour_start(name) + 3600)
+            period = 0.0
+            for min_age, p in self.downsample:
+                if age >= min_age:
+                    period = p
+            period_ms = round(period * 1000)
+            if not period_ms:
+                continue
+            filename = os.path.join(self.directory, name)
+            chunks = self._chunks(filename)
+            if all(chunk[3] >= period_ms for chunk in chunks):
+                continue
+            kept = []
+            # แบ่งช่วงด้วยจำนวนเต็ม (ไมโครวินาที) เพราะ % ของ float ขนาด unix timestamp คลาดเคลื่อน
+            period_us = period_ms * (_TIME_SCALE // 1000)
+            previous = None
+            with open(filename, "rb") as f:
+                for first, last, count, _, offset, length, version in chunks:
+                    f.seek(offset)
+                    for row in _decode(f.read(length), count, first, version):
+                        bucket = round(row[0] * _TIME_SCALE) // period_us
+                        if bucket != previous:
+                            kept.append(row)
+                            previous = bucket
+            tmp = filename + ".tmp"
+            try:
+                open(tmp, "wb").close()
+                for i in range(0, len(kept), self.chunk_size):
+                    self._write_chunk(tmp, kept[i:i + self.chunk_size], period_ms)
+                os.replace(tmp, filename)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            self._index.pop(filename, None)
+            rewritten += 1
+        return rewritten
+
+    def info(self):
+        """
+        สรุปแต่ละไฟล์
+
+        Returns:
+            list: (ชื่อไฟล์, จำนวนแถว, คาบ ms, ขนาดไฟล์ ไบต์)
+        """
+        result = []
+        for name in self.files():
+            filename = os.path.join(self.directory, name)
+            chunks = self._chunks(filename)
+            result.append((name, sum(c[2] for c in chunks), max((c[3] for c in chunks), default=0),
+                           os.path.getsize(filename)))
+        return result
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 2 and argv[0] == "info":
+        with TelemetryArchive(argv[1]) as archive:
+            for name, rows, period, size in archive.info():
+                print(f"{name}  {rows:9d} แถว  {'raw' if not period else f'{period} ms':>8}  {size / 1024:9.1f} KiB")
+    elif 3 <= len(argv) <= 5 and argv[0] == "export":
+        bounds = [float(v) for v in argv[3:5]] + [None, None]
+        with TelemetryArchive(argv[1]) as archive, open(argv[2], "w", encoding="utf-8") as out:
+            out.write("time," + ",".join(f"q{i}" for i in range(6)) + ","
+                      + ",".join(f"qd{i}" for i in range(6)) + ",x,y,z,rx,ry,rz\n")
+            for t, q, qd, pose in archive.query(bounds[0], bounds[1]):
+                out.write(",".join(map(repr, (t,) + q + qd + pose)) + "\n")
+    elif len(argv) == 2 and argv[0] == "compact":
+        with TelemetryArchive(argv[1]) as archive:
+            print(f"ลดความถี่ {archive.compact()} ไฟล์")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
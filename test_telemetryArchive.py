@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from telemetryArchive import TelemetryArchive, _hour_name
+
+T0 = 1700000000.1  # unix timestamp ที่ % 0.1 คลาดเคลื่อนใน float
+
+
+def _fill(archive, start, seconds, rate=500):
+    for i in range(int(seconds * rate)):
+        t = start + i / rate
+        archive.append(t, [0.001 * i] * 6, [0.01] * 6, [0.3, -0.1, 0.2 + 1e-5 * i, 2.2, -2.2, 0.0])
+
+
+class TelemetryArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_append_query_roundtrip(self):
+        with TelemetryArchive(self.directory, chunk_size=700, auto_compact=False) as archive:
+            _fill(archive, T0, 6)
+            archive.flush()
+            rows = list(archive.query())
+            self.assertEqual(len(rows), 3000)
+            t, q, qd, pose = rows[1234]
+            self.assertAlmostEqual(t, T0 + 1234 / 500, places=5)
+            self.assertAlmostEqual(q[0], 1.234, places=5)
+            self.assertAlmostEqual(pose[2], 0.2 + 0.01234, places=5)
+            part = list(archive.query(T0 + 1, T0 + 2))
+            self.assertEqual(len(part), 501)  # ช่วงรวมทั้งสองปลาย
+
+    def test_rows_far_apart_in_one_chunk(self):
+        with TelemetryArchive(self.directory, auto_compact=False) as archive:
+            archive.append(T0, [0] * 6, [0] * 6, [0] * 6)
+            archive.append(T0 + 2400, [1] * 6, [0] * 6, [0] * 6)
+            archive.flush()
+            times = [row[0] for row in archive.query()]
+        self.assertEqual(len(times), 2)
+        self.assertAlmostEqual(times[1] - times[0], 2400, places=5)
+
+    def test_compact_keeps_one_row_per_period(self):
+        with TelemetryArchive(self.directory, auto_compact=False) as archive:
+            _fill(archive, T0, 6)
+            archive.flush()
+            self.assertEqual(archive.compact(now=T0 + 2 * 24 * 3600), 1)
+            rows = list(archive.query())
+            self.assertEqual(len(rows), 60)
+            self.assertTrue(all(b[0] - a[0] > 0.09 for a, b in zip(rows, rows[1:])))
+            # compact ซ้ำไม่เขียนไฟล์ที่ลดความถี่แล้ว
+            self.assertEqual(archive.compact(now=T0 + 2 * 24 * 3600), 0)
+
+    def test_compact_on_hour_rollover(self):
+        old = T0 - 3 * 24 * 3600
+        with TelemetryArchive(self.directory) as archive:
+            _fill(archive, old, 2)
+            archive.flush()
+            _fill(archive, T0, 1)  # ขึ้นชั่วโมงใหม่: ไฟล์เก่าถูกลดความถี่เอง
+            archive.flush()
+            old_rows = list(archive.query(end=old + 10))
+        self.assertEqual(len(old_rows), 20)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, _hour_name(T0))))
+
+
+if __name__ == "__main__":
+    unittest.main()
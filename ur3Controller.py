@@ -0,0 +1,561 @@
+import math
+import select
+import socket
+import threading
+import time
+import struct
+
+import urMetrics
+import urTrace
+from urState import StateStream
+
+
+class UR3Controller:
+    def __init__(self, host, port=30002, verbose=True, rt_port=30003):
+        """
+        เริ่มต้นการเชื่อมต่อกับ UR3 ผ่าน TCP/IP
+
+        Args:
+            host (str): IP address ของแขนกล UR3
+            port (int): พอร์ตสำหรับการเชื่อมต่อ (ค่าเริ่มต้นคือ 30002 สำหรับควบคุมโดยตรง)
+            verbose (bool): พิมพ์ข้อความทุกครั้งที่ส่งคำสั่ง (ปิดเพื่อลด I/O ในลูปที่ต้องการความเร็ว)
+            rt_port (int): พอร์ต Real-time interface สำหรับอ่านสถานะ (ค่าเริ่มต้นคือ 30003)
+        """
+        self.host = host
+        self.port = port
+        self.rt_port = rt_port
+        self.verbose = verbose
+        self.socket = None
+        self.state_stream = None
+        self.command_queue = None
+        self.estimator = None
+        # ถูก set เมื่อต้องหยุดการเคลื่อนที่กะทันหัน (เช่น ตรวจพบการชน) เพื่อให้ wait() คืนค่าทันที
+        self.abort_event = threading.Event()
+        self._send_lock = threading.Lock()
+        self._connected_once = False
+        # เวลารอการเชื่อมต่อสูงสุด (วินาที) - None คือรอตามค่าของระบบปฏิบัติการ
+        self.connect_timeout = None
+        # ฟังก์ชันที่ถูกเรียกเมื่อส่งคำสั่งไม่สำเร็จ (รับ exception หนึ่งตัว) เช่นเพื่อเริ่มเชื่อมต่อใหม่
+        self.on_send_error = None
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def connect(self, quiet=False):
+        """
+        เชื่อมต่อกับแขนกล UR3 (ปิด socket เดิมก่อนถ้ามี)
+
+        Args:
+            quiet (bool): ไม่พิมพ์ข้อความเมื่อเชื่อมต่อไม่สำเร็จ (เช่น ตอนลองใหม่ถี่ ๆ)
+        """
+        if self.socket:
+            self.socket.close()
+        try:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.settimeout(self.connect_timeout)
+            self.socket.connect((self.host, self.port))
+            self.socket.settimeout(None)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self._connected_once:
+                urMetrics.inc("ur_reconnects_total")
+            self._connected_once = True
+            print(f"เชื่อมต่อกับ UR3 ที่ {self.host}:{self.port} สำเร็จแล้ว")
+            return True
+        except Exception as e:
+            if not quiet:
+                print(f"การเชื่อมต่อล้มเหลว: {e}")
+            return False
+
+    def is_connected(self):
+        """
+        ตรวจว่า socket คำสั่งยังเชื่อมต่ออยู่โดยไม่รอ (อีกฝั่งปิดหรือ reset แล้วคือ False)
+
+        Returns:
+            bool
+        """
+        sock = self.socket
+        if sock is None:
+            return False
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            # อ่านได้แต่ไม่มีข้อมูล (b"") คืออีกฝั่งปิดการเชื่อมต่อแล้ว
+            return not readable or sock.recv(1, socket.MSG_PEEK) != b""
+        except (OSError, ValueError):
+            return False
+
+    def disconnect(self):
+        """ยกเลิกการเชื่อมต่อจาก UR3"""
+        self.stop_command_queue()
+        self.stop_state_estimator()
+        self.stop_state_stream()
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+            print("ยกเลิกการเชื่อมต่อแล้ว")
+
+    def send(self, command):
+        """
+        ส่งคำสั่ง URScript หนึ่งบรรทัด (หรือทั้งโปรแกรม) ผ่าน socket ที่เชื่อมต่ออยู่
+
+        Args:
+            command (str): คำสั่ง URScript
+
+        Returns:
+            bool: สถานะการส่งคำสั่ง
+        """
+        if not self.socket:
+            print("ไม่ได้เชื่อมต่อกับ UR3 กรุณาเชื่อมต่อก่อน")
+            return False
+
+        t0 = urMetrics.start()
+        try:
+            # ล็อกไว้เพราะ thread อื่น (เช่น ตัวตรวจจับการชน) อาจส่ง stopj พร้อมกัน
+            with self._send_lock:
+                self.socket.sendall(command.encode('utf-8'))
+        except Exception as e:
+            urMetrics.inc("ur_send_errors_total")
+            print(f"การส่งคำสั่งล้มเหลว: {e}")
+            if self.on_send_error is not None:
+                self.on_send_error(e)
+            return False
+        urMetrics.observe("ur_send_seconds", t0)
+        urMetrics.inc("ur_commands_total")
+        return True
+
+    def move_to_pose(self, x, y, z, rx, ry, rz, a=1.2, v=0.25, t=0, r=0):
+        """
+        ส่งคำสั่งให้แขนกล UR3 เคลื่อนที่ไปยังตำแหน่งและการหมุนที่กำหนด
+
+        Args:
+            x, y, z (float): ตำแหน่งปลายแขนกลใน (เมตร)
+            rx, ry, rz (float): การหมุนรอบแกน x, y, z (เรเดียน)
+            a (float): ความเร่ง (m/s^2)
+            v (float): ความเร็ว (m/s)
+            t (float): เวลาที่ใช้ในการเคลื่อนที่ (วินาที) - 0 หมายถึงใช้ความเร็วและความเร่งที่กำหนด
+            r (float): รัศมีการเคลื่อนที่ (เมตร) - 0 คือหยุดที่จุดที่กำหนดอย่างเต็มที่
+
+        Returns:
+            bool: สถานะการส่งคำสั่ง
+        """
+        # สร้างคำสั่ง URScript สำหรับการเคลื่อนที่
+        command = move_command("movej", (x, y, z, rx, ry, rz), a, v, t, r)
+        with urTrace.span("movej", "arm"):
+            if not self.send(command):
+                return False
+        self._log(f"ส่งคำสั่งเคลื่อนที่ไปยัง: x={x}, y={y}, z={z}, rx={rx}, ry={ry}, rz={rz}")
+        return True
+
+    def move_linear(self, x, y, z, rx, ry, rz, a=1.2, v=0.11, t=0, r=0):
+        """
+        ส่งคำสั่งให้แขนกล UR3 เคลื่อนที่เป็นเส้นตรงไปยังตำแหน่งและการหมุนที่กำหนด
+
+        Args:
+            คล้ายกับ move_to_pose แต่ใช้การเคลื่อนที่เป็นเส้นตรง
+
+        Returns:
+            bool: สถานะการส่งคำสั่ง
+        """
+        # สร้างคำสั่ง URScript สำหรับการเคลื่อนที่เป็นเส้นตรง
+        command = move_command("movel", (x, y, z, rx, ry, rz), a, v, t, r)
+        with urTrace.span("movel", "arm"):
+            if not self.send(command):
+                return False
+        self._log(f"ส่งคำสั่งเคลื่อนที่เป็นเส้นตรงไปยัง: x={x}, y={y}, z={z}, rx={rx}, ry={ry}, rz={rz}")
+        return True
+
+    def move_joints(self, q, a=1.0, v=0.5, t=0, r=0):
+        """
+        ส่งคำสั่งให้แขนกลเคลื่อนที่ไปยังมุมข้อต่อที่กำหนด
+
+        Args:
+            q (list): มุมของ base, shoulder, elbow, wrist1, wrist2, wrist3 (เรเดียน)
+            a (float): ความเร่งเชิงมุม (rad/s^2)
+            v (float): ความเร็วเชิงมุม (rad/s)
+            t, r: เหมือนกับ move_to_pose
+
+        Returns:
+            bool: สถานะการส่งคำสั่ง
+        """
+        base, shoulder, elbow, wrist1, wrist2, wrist3 = q
+        command = f"movej([{base}, {shoulder}, {elbow}, {wrist1}, {wrist2}, {wrist3}], a={a}, v={v}, t={t}, r={r})\n"
+        with urTrace.span("movej", "arm"):
+            if not self.send(command):
+                return False
+        self._log(f"ส่งคำสั่งเคลื่อนที่ข้อต่อไปยัง: {list(q)}")
+        return True
+
+    def send_program(self, lines, name="ur_program"):
+        """
+        ส่งหลายคำสั่งเป็นโปรแกรม URScript เดียว จำเป็นสำหรับการเคลื่อนที่แบบ blend (r > 0)
+        เพราะคำสั่งที่ส่งทีละบรรทัดผ่านพอร์ต 30002 จะถูกทำเป็นโปรแกรมใหม่และขัดจังหวะคำสั่งก่อนหน้า
+
+        Args:
+            lines (list): คำสั่ง URScript ทีละบรรทัด เช่นจาก move_command()
+            name (str): ชื่อโปรแกรม
+
+        Returns:
+            bool: สถานะการส่งคำสั่ง
+        """
+        body = "".join(f"  {line.strip()}\n" for line in lines)
+        with urTrace.span(name, "arm", {"lines": len(lines)}):
+            return self.send(f"def {name}():\n{body}end\n")
+
+    def run_path(self, path, library=None, wait=True, timeout=None):
+        """
+        เคลื่อนที่ตามเส้นทางทั้งเส้นเป็นโปรแกรม URScript เดียว
+
+        Args:
+            path: WaypointPath หรือชื่อเส้นทางใน library
+            library (WaypointLibrary): คลังเส้นทาง (ต้องระบุเมื่อ path เป็นชื่อ)
+            wait (bool): รอจนถึงจุดสุดท้าย
+            timeout (float): เวลารอสูงสุด (วินาที) - None คือประมาณจากระยะทางแล้วเผื่อไว้สองเท่า
+
+        Returns:
+            bool: False ถ้าไม่พบเส้นทาง ส่งไม่สำเร็จ หรือไปไม่ถึงภายในเวลาที่กำหนด
+        """
+        if library is not None:
+            name = path
+            path = library.get(name)
+            if path is None:
+                print(f"ไม่พบเส้นทาง {name} ใน {library.filename}")
+                return False
+        if not path.poses:
+            return True
+
+        last = len(path.poses) - 1
+        radii = path.radii or [path.r] * len(path.poses)
+        lines = [move_command(kind, pose, path.a, path.v, 0, radii[i] if i < last else 0)
+                 for i, (kind, pose) in enumerate(zip(path.kinds, path.poses))]
+        if not self.send_program(lines, "ur_path"):
+            return False
+        self._log(f"ส่งเส้นทาง {path.name} ({len(path.poses)} จุด)")
+        if not wait:
+            return True
+        if timeout is None:
+            start = self.get_current_pose() or path.poses[0]
+            distance = 0.0
+            for pose in path.poses:
+                distance += linear_duration(position_distance(start, pose), path.v, path.a)
+                start = pose
+            timeout = 2.0 * distance + 5.0
+        return self.wait_for_pose(path.poses[-1], timeout)
+
+    def stop(self, a=2.0):
+        """หยุดการเคลื่อนที่ของแขนกลด้วย stopj"""
+        urTrace.instant("stopj", "arm")
+        return self.send(f"stopj({a})\n")
+
+    def wait(self, seconds):
+        """
+        รอให้แขนกลเคลื่อนที่เสร็จ (แทน time.sleep เพื่อให้นับเวลารอใน metric ได้)
+
+        Args:
+            seconds (float): เวลาที่รอ (วินาที)
+
+        Returns:
+            bool: False ถ้าการรอถูกยกเลิกเพราะมีการสั่งหยุดกะทันหัน (abort_event)
+        """
+        t0 = urMetrics.start()
+        with urTrace.span("wait", "sleep", {"seconds": seconds}):
+            aborted = self.abort_event.wait(seconds)
+        urMetrics.observe("ur_move_wait_seconds", t0)
+        return not aborted
+
+    def wait_for_pose(self, pose, timeout, tolerance=0.002, speed_tolerance=0.005, angle_tolerance=0.01):
+        """
+        รอจนปลายแขนถึงตำแหน่งที่กำหนดและหยุดนิ่ง โดยใช้ state stream
+        ถ้าไม่ได้เปิด state stream จะรอครบ timeout เหมือน wait()
+
+        Args:
+            pose (list): [x, y, z, rx, ry, rz] ตำแหน่งเป้าหมาย
+            timeout (float): เวลารอสูงสุด (วินาที)
+            tolerance (float): ระยะห่างจากเป้าหมายที่ยอมรับได้ (เมตร)
+            speed_tolerance (float): ความเร็วปลายแขนที่ถือว่าหยุดนิ่ง (m/s)
+            angle_tolerance (float): มุมห่างจากการหมุนของเป้าหมายที่ยอมรับได้ (เรเดียน)
+
+        Returns:
+            bool: True ถ้าถึงเป้าหมาย, False ถ้าหมดเวลาหรือถูกสั่งหยุดกะทันหัน
+        """
+        stream = self.state_stream
+        if not (stream and stream.running):
+            return self.wait(timeout)
+
+        t0 = urMetrics.start()
+        deadline = time.monotonic() + timeout
+        reached = False
+        with urTrace.span("wait_for_pose", "state"):
+            while not self.abort_event.is_set():
+                state = stream.latest
+                if state is not None and at_pose(state, pose, tolerance, speed_tolerance, angle_tolerance):
+                    reached = True
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                stream.wait_for_update(min(remaining, 0.1))
+        urMetrics.observe("ur_move_wait_seconds", t0)
+        return reached
+
+    def start_state_stream(self, timeout=None):
+        """
+        เริ่มอ่านข้อมูลสถานะจากพอร์ต Real-time อย่างต่อเนื่อง หลังจากนี้ get_current_pose
+        จะอ่านจากข้อมูลล่าสุดแทนการเปิด socket ใหม่ทุกครั้ง
+        ถ้า stream เดิมขาดไป จะเริ่ม object เดิมใหม่ ผู้รับข้อมูลที่ลงทะเบียนไว้ (เช่น ContactMonitor) จึงยังอยู่ครบ
+
+        Args:
+            timeout (float): ถ้าไม่ได้รับ packet ภายในเวลานี้จะถือว่าการเชื่อมต่อขาด (วินาที)
+                - None คือค่าเดิมของ stream หรือ 1 วินาทีสำหรับ stream ใหม่
+
+        Returns:
+            StateStream: หรือ None ถ้าเชื่อมต่อไม่ได้
+        """
+        stream = self.state_stream
+        if stream is not None and stream.running:
+            return stream
+        if stream is None:
+            stream = StateStream(self.host, self.rt_port, 1.0 if timeout is None else timeout)
+        elif timeout is not None:
+            stream.timeout = timeout
+        try:
+            stream.start()
+        except OSError as e:
+            print(f"เชื่อมต่อพอร์ต {self.rt_port} ไม่สำเร็จ: {e}")
+            return None
+        self.state_stream = stream
+        return stream
+
+    def start_command_queue(self, depth=8, **options):
+        """
+        เปิดคิวคำสั่งเคลื่อนที่ (MotionQueue) ที่คืน MoveHandle สำหรับรอ ยกเลิก หรือแทรกคำสั่ง
+        (เปิด state stream ให้ถ้ายังไม่ได้เปิด)
+
+        Args:
+            depth (int): จำนวนคำสั่งที่รอได้สูงสุด
+            options: tolerance, speed_tolerance, stop_acceleration ส่งต่อให้ MotionQueue
+
+        Returns:
+            MotionQueue: หรือ None ถ้าเปิด state stream ไม่ได้
+        """
+        if self.command_queue is not None:
+            return self.command_queue
+        if self.start_state_stream() is None:
+            return None
+        from motionQueue import MotionQueue
+        self.command_queue = MotionQueue(self, depth, **options).start()
+        return self.command_queue
+
+    def stop_command_queue(self):
+        """ยกเลิกคำสั่งที่ค้างในคิวและปิดคิว"""
+        if self.command_queue is not None:
+            self.command_queue.stop()
+            self.command_queue = None
+
+    def start_state_estimator(self, **options):
+        """
+        เปิดตัวประมาณสถานะ (StateEstimator) ที่ชดเชยความล่าช้าของข้อมูลจาก state stream
+        ใช้ estimator.predict_pose(lead=...) แทน get_current_pose เมื่อต้องการตำแหน่ง ณ ตอนนี้จริง ๆ
+
+        Args:
+            options: transport_delay, smoothing, max_horizon ส่งต่อให้ StateEstimator
+
+        Returns:
+            StateEstimator: หรือ None ถ้าเปิด state stream ไม่ได้
+        """
+        if self.estimator is not None:
+            return self.estimator
+        stream = self.start_state_stream()
+        if stream is None:
+            return None
+        from stateEstimator import StateEstimator
+        self.estimator = StateEstimator(stream, **options).start()
+        return self.estimator
+
+    def stop_state_estimator(self):
+        if self.estimator is not None:
+            self.estimator.stop()
+            self.estimator = None
+
+    def stop_state_stream(self):
+        """หยุดอ่านข้อมูลสถานะ"""
+        if self.state_stream:
+            self.state_stream.stop()
+            self.state_stream = None
+
+    def get_current_pose(self):
+        """
+        ขอข้อมูลตำแหน่งปัจจุบันของแขนกล UR3
+
+        Returns:
+            list: [x, y, z, rx, ry, rz] หรือ None ถ้าล้มเหลว
+        """
+        if not self.socket:
+            print("ไม่ได้เชื่อมต่อกับ UR3 กรุณาเชื่อมต่อก่อน")
+            return None
+
+        t0 = urMetrics.start()
+        with urTrace.span("get_current_pose", "state"):
+            pose = self._read_pose()
+        if pose is None:
+            urMetrics.inc("ur_pose_read_errors_total")
+        else:
+            urMetrics.observe("ur_pose_read_seconds", t0)
+        return pose
+
+    def _read_pose(self):
+        stream = self.state_stream
+        if stream and stream.running:
+            state = stream.get()
+            if state is not None:
+                return list(state.tcp_pose)
+
+        try:
+            # วิธีที่ 1: ใช้ RTDE (Real-Time Data Exchange) หรือช่องทางข้อมูลแบบเรียลไทม์
+            # สร้างซ็อกเก็ตใหม่สำหรับพอร์ต 30003 (Real-time data)
+            data_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            data_socket.connect((self.host, self.rt_port))
+            data_socket.settimeout(1)
+
+            # รับข้อมูลไบนารี (ไม่ใช่ UTF-8)
+            data = data_socket.recv(1116)  # ขนาดข้อมูลที่ UR ส่งมา (อาจแตกต่างกันตามรุ่น)
+            data_socket.close()
+
+            if len(data) >= 492:  # ตรวจสอบว่าได้รับข้อมูลเพียงพอหรือไม่
+                # แปลงข้อมูลไบนารีเป็นค่าตำแหน่ง
+                # ตำแหน่ง TCP เริ่มต้นที่ตำแหน่ง 444 ในข้อมูล (สำหรับ UR3 รุ่นใหม่)
+                # ข้อมูลแต่ละตัวเป็น double (8 ไบต์)
+                pose = list(struct.unpack('!6d', data[444:492]))
+                return pose
+            else:
+                print("ได้รับข้อมูลไม่เพียงพอจาก UR3")
+                return None
+
+        except Exception as e:
+            self._log(f"การรับข้อมูลตำแหน่งล้มเหลว: {e}")
+
+            # วิธีที่ 2: ใช้การส่งคำสั่งและรอรับผลลัพธ์
+            try:
+                # ส่งคำสั่งเพื่อขอข้อมูลตำแหน่ง
+                command = "get_actual_tcp_pose()\n"
+                self.socket.send(command.encode('utf-8'))
+
+                # รอรับข้อมูลผลลัพธ์ (อาจต้องปรับเปลี่ยนตามรุ่นของ UR)
+                time.sleep(0.1)  # รอให้ UR3 ประมวลผลคำสั่ง
+                result = self.socket.recv(1024)
+
+                # แยกข้อมูลและแปลงเป็นตัวเลข
+                # หมายเหตุ: รูปแบบผลลัพธ์อาจแตกต่างกันขึ้นอยู่กับรุ่นและเฟิร์มแวร์
+                result_str = result.decode('utf-8', errors='replace')  # ใช้ 'replace' เพื่อจัดการกับข้อมูลที่ไม่ใช่ UTF-8
+
+                # แยกส่วนที่เป็นตำแหน่ง
+                # ตัวอย่าง: "p[0.1, 0.2, 0.3, 0.0, 3.14, 0.0]"
+                pose_values = _parse_pose(result_str)
+                if pose_values:
+                    return pose_values
+
+                print("ไม่สามารถแยกค่าตำแหน่งจากผลลัพธ์ได้")
+                return None
+
+            except Exception as e2:
+                self._log(f"วิธีที่ 2 ล้มเหลว: {e2}")
+
+                # วิธีที่ 3: ใช้ Dashboard Server (พอร์ต 29999)
+                try:
+                    dashboard = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    dashboard.connect((self.host, 29999))
+                    dashboard.settimeout(1)
+
+                    # ส่งคำสั่ง get pose ผ่าน Dashboard
+                    dashboard.send("get actual_tcp_pose\n".encode('utf-8'))
+                    response = dashboard.recv(1024)
+                    dashboard.close()
+
+                    response_str = response.decode('utf-8', errors='replace')
+                    # ตัวอย่างผลลัพธ์: "p[0.1, 0.2, 0.3, 0.0, 3.14, 0.0]"
+                    pose_values = _parse_pose(response_str)
+                    if pose_values:
+                        return pose_values
+
+                    print("ไม่สามารถอ่านตำแหน่งผ่าน Dashboard Server ได้")
+                    return None
+
+                except Exception as e3:
+                    print(f"ทุกวิธีล้มเหลว: {e3}")
+                    return None
+
+
+def move_command(kind, pose, a=1.2, v=0.25, t=0, r=0):
+    """
+    สร้างคำสั่ง URScript สำหรับการเคลื่อนที่หนึ่งครั้ง
+
+    Args:
+        kind (str): "movej" หรือ "movel"
+        pose (list): [x, y, z, rx, ry, rz]
+        a, v, t, r: เหมือนกับ move_to_pose
+
+    Returns:
+        str: คำสั่งหนึ่งบรรทัด
+    """
+    x, y, z, rx, ry, rz = pose
+    return f"{kind}(p[{x}, {y}, {z}, {rx}, {ry}, {rz}], a={a}, v={v}, t={t}, r={r})\n"
+
+
+def linear_duration(distance, v, a):
+    """
+    ประมาณเวลาเคลื่อนที่เป็นเส้นตรงระยะ distance ด้วยโปรไฟล์ความเร็วแบบสี่เหลี่ยมคางหมู
+
+    Args:
+        distance (float): ระยะทาง (เมตร)
+        v (float): ความเร็วสูงสุด (m/s)
+        a (float): ความเร่ง (m/s^2)
+
+    Returns:
+        float: เวลา (วินาที)
+    """
+    if distance <= 0:
+        return 0.0
+    if distance >= v * v / a:
+        return distance / v + v / a
+    # ไม่ถึงความเร็วสูงสุด (โปรไฟล์สามเหลี่ยม)
+    return 2.0 * math.sqrt(distance / a)
+
+
+def position_distance(p, q):
+    return math.sqrt((p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2)
+
+
+def _quaternion(rx, ry, rz):
+    angle = math.sqrt(rx * rx + ry * ry + rz * rz)
+    if angle < 1e-12:
+        return (1.0, 0.0, 0.0, 0.0)
+    s = math.sin(angle / 2) / angle
+    return (math.cos(angle / 2), rx * s, ry * s, rz * s)
+
+
+def orientation_distance(p, q):
+    """มุม (เรเดียน) ระหว่างการหมุนของ pose สองตัว (rx, ry, rz เป็น rotation vector)"""
+    a, b = _quaternion(*p[3:6]), _quaternion(*q[3:6])
+    dot = abs(sum(x * y for x, y in zip(a, b)))
+    return 2.0 * math.acos(min(1.0, dot))
+
+
+def at_pose(state, pose, tolerance=0.002, speed_tolerance=0.005, angle_tolerance=0.01):
+    """
+    True ถ้าปลายแขนใน state อยู่ที่ pose ทั้งตำแหน่งและการหมุน และหยุดนิ่งแล้ว
+    (ตรวจการหมุนด้วย มิฉะนั้นคำสั่งที่หมุนอย่างเดียวจะถือว่าถึงตั้งแต่ก่อนเริ่มหมุน)
+    """
+    return position_distance(state.tcp_pose, pose) <= tolerance \
+        and position_distance(state.tcp_speed, (0, 0, 0)) <= speed_tolerance \
+        and (len(pose) < 6 or orientation_distance(state.tcp_pose, pose) <= angle_tolerance)
+
+
+def _parse_pose(text):
+    """แยกค่า p[x, y, z, rx, ry, rz] จากข้อความ คืน None ถ้าไม่พบหรือไม่ครบ 6 ค่า"""
+    start_idx = text.find("p[")
+    end_idx = text.find("]", start_idx)
+    if start_idx == -1 or end_idx == -1:
+        return None
+    pose_values = [float(val.strip()) for val in text[start_idx+2:end_idx].split(',')]
+    if len(pose_values) == 6:
+        return pose_values
+    return None
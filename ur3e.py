@@ -0,0 +1,303 @@
+"""
+ur3e - คำสั่งเดียวสำหรับควบคุมแขนกล UR3e และ gripper RG2
+
+    python ur3e.py [--host IP] <คำสั่ง> ...
+
+คำสั่ง: home, move, path, sweep, grip, pose, record, bench
+โมดูลที่ import ช้า (pycurl, xmlrpc, NumPy, ตัวควบคุมแขนกล) จะถูก import เฉพาะในคำสั่งที่ต้องใช้
+เพื่อให้คำสั่งสั้น ๆ จาก shell เริ่มทำงานได้เร็ว
+"""
+import argparse
+import os
+import sys
+
+DEFAULT_HOST = "10.1.63.10"
+
+# ท่าเริ่มต้นเดียวกับ move_to_org() ใน ex3/ex6 (องศา)
+HOME_JOINTS = (0, -90, -90, -90, 90, 0)
+
+
+def _robot(args, stream=False):
+    from ur3Controller import UR3Controller
+    robot = UR3Controller(args.host, args.port, verbose=not args.quiet, rt_port=args.rt_port)
+    if not robot.connect():
+        sys.exit(1)
+    if stream and robot.start_state_stream() is None:
+        sys.exit(1)
+    return robot
+
+
+def cmd_home(args):
+    import math
+    robot = _robot(args)
+    try:
+        robot.move_joints([math.radians(d) for d in args.joints], a=args.a, v=args.v)
+        if args.wait:
+            robot.wait(args.wait)
+    finally:
+        robot.disconnect()
+
+
+def cmd_move(args):
+    robot = _robot(args, stream=args.wait > 0)
+    try:
+        move = robot.move_linear if args.linear else robot.move_to_pose
+        move(*args.pose, a=args.a, v=args.v)
+        if args.wait:
+            if not robot.wait_for_pose(args.pose, args.wait):
+                print("ไปไม่ถึงตำแหน่งเป้าหมายภายในเวลาที่กำหนด")
+                sys.exit(2)
+    finally:
+        robot.disconnect()
+
+
+def cmd_path(args):
+    import waypointLib
+    library = None
+    if args.library:
+        library = waypointLib.WaypointLibrary(args.library)
+        if args.target not in library:
+            print(f"ไม่พบเส้นทาง {args.target} ใน {args.library}")
+            sys.exit(1)
+        path = args.target
+    else:
+        path = waypointLib.load_text(args.target, a=args.a, v=args.v, r=args.blend)
+    if args.auto_blend is not None:
+        import blendRadius
+        if library is not None:
+            path = library[path]
+            library.close()
+            library = None
+        plan = blendRadius.blend_path(path, args.auto_blend)
+        print(plan)
+    robot = _robot(args, stream=True)
+    try:
+        if not robot.run_path(path, library, timeout=args.timeout):
+            print("ไปไม่ถึงจุดสุดท้ายภายในเวลาที่กำหนด")
+            sys.exit(2)
+    finally:
+        robot.disconnect()
+        if library is not None:
+            library.close()
+
+
+def cmd_sweep(args):
+    import paramSweep
+    import waypointLib
+    if args.library:
+        with waypointLib.WaypointLibrary(args.library) as library:
+            path = library.get(args.target)
+        if path is None:
+            print(f"ไม่พบเส้นทาง {args.target} ใน {args.library}")
+            sys.exit(1)
+    else:
+        path = waypointLib.load_text(args.target)
+    program = paramSweep.Program.from_path(path)
+    if args.random:
+        params = paramSweep.random_params(args.random, args.a[:2], args.v[:2], args.blend[:2], args.seed)
+    else:
+        params = paramSweep.grid(*(paramSweep.linspace(lo, hi, int(n)) for lo, hi, n in (args.a, args.v, args.blend)))
+    hosts = [tuple(int(x) if i else x for i, x in enumerate(h.split(":"))) for h in args.sim]
+    failed = []
+    try:
+        front = paramSweep.sweep(program, params, ("cycle_time", args.objective), workers=args.workers,
+                                 hosts=hosts or None, failed=failed)
+    except ValueError as e:
+        print(e)
+        sys.exit(2)
+    for result in failed:
+        print(f"ล้มเหลว: {result}")
+    print(f"ประเมิน {len(params)} ชุด (ล้มเหลว {len(failed)}), Pareto front {len(front)} ชุด:")
+    for result in front:
+        print(result)
+
+
+def cmd_grip(args):
+    import rgGripper
+    gripper = rgGripper.RG2(args.host, args.id, verbose=not args.quiet)
+    if args.width is None:
+        print(gripper.get_rg_width())
+    else:
+        gripper.rg_grip(args.width, args.force)
+
+
+def cmd_pose(args):
+    robot = _robot(args, stream=args.watch)
+    try:
+        while True:
+            pose = robot.get_current_pose()
+            if pose is None:
+                sys.exit(1)
+            print(" ".join(f"{v:.4f}" for v in pose))
+            if not args.watch:
+                break
+            robot.wait(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        robot.disconnect()
+
+
+def cmd_record(args):
+    import time
+    from urState import StateStream
+    stream = StateStream(args.host, args.rt_port)
+    stream.start()
+    if args.archive:
+        from telemetryArchive import TelemetryArchive
+        archive = TelemetryArchive(args.out)
+        archive.record(stream)
+        try:
+            time.sleep(args.duration)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stream.stop()
+            archive.close()
+        print(f"บันทึกลงคลัง {args.out} แล้ว")
+        return
+    out = open(args.out, "w", encoding="utf-8")
+    out.write("time," + ",".join(f"q{i}" for i in range(6)) + ","
+              + ",".join(f"qd{i}" for i in range(6)) + ",x,y,z,rx,ry,rz\n")
+    count = 0
+    every = max(1, args.decimate)
+
+    def write(state):
+        nonlocal count
+        count += 1
+        if count % every == 0:
+            out.write(",".join(map(repr, (state.timestamp,) + state.q + state.qd + state.tcp_pose)) + "\n")
+
+    stream.subscribe(write)
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.stop()
+        out.close()
+    print(f"บันทึก {count // every} แถวไว้ที่ {args.out}")
+
+
+def cmd_bench(args):
+    import subprocess
+    import time
+    here = os.path.abspath(__file__)
+
+    def run(code):
+        samples = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(here),
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            samples.append(time.perf_counter() - t0)
+        samples.sort()
+        return samples[len(samples) // 2]
+
+    baseline = run("pass")
+    print(f"{'python (ไม่มีอะไร)':<28}{baseline * 1000:8.1f} ms")
+    for label, code in (("ur3e --help", "import ur3e, sys; sys.argv=['ur3e', '--help']\ntry: ur3e.main()\nexcept SystemExit: pass"),
+                        ("import ur3Controller", "import ur3Controller"),
+                        ("import rgGripper", "import rgGripper"),
+                        ("import numpy", "import numpy")):
+        try:
+            t = run(code)
+        except subprocess.CalledProcessError:
+            print(f"{label:<28}{'ไม่มีโมดูล':>8}")
+            continue
+        print(f"{label:<28}{t * 1000:8.1f} ms  (+{(t - baseline) * 1000:.1f} ms)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ur3e", description="ควบคุมแขนกล UR3e และ gripper RG2")
+    parser.add_argument("--host", default=os.environ.get("UR3E_HOST", DEFAULT_HOST),
+                        help="IP ของแขนกล (ค่าเริ่มต้นจาก UR3E_HOST)")
+    parser.add_argument("--port", type=int, default=30002, help="พอร์ตส่งคำสั่ง")
+    parser.add_argument("--rt-port", type=int, default=30003, help="พอร์ต Real-time สำหรับอ่านสถานะ")
+    parser.add_argument("-q", "--quiet", action="store_true", help="ไม่พิมพ์ข้อความทุกคำสั่ง")
+    parser.add_argument("--metrics", type=int, metavar="PORT", help="เปิด metric endpoint ที่พอร์ตนี้")
+    parser.add_argument("--trace", metavar="FILE", help="บันทึก Chrome trace เมื่อจบคำสั่ง")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("home", help="กลับท่าเริ่มต้น")
+    p.add_argument("--joints", type=float, nargs=6, default=HOME_JOINTS, metavar="DEG")
+    p.add_argument("-a", type=float, default=1.0)
+    p.add_argument("-v", type=float, default=0.5)
+    p.add_argument("--wait", type=float, default=0, help="รอหลังส่งคำสั่ง (วินาที)")
+    p.set_defaults(func=cmd_home)
+
+    p = sub.add_parser("move", help="เคลื่อนที่ไปยังตำแหน่ง x y z rx ry rz")
+    p.add_argument("pose", type=float, nargs=6)
+    p.add_argument("-l", "--linear", action="store_true", help="ใช้ movel แทน movej")
+    p.add_argument("-a", type=float, default=1.2)
+    p.add_argument("-v", type=float, default=0.25)
+    p.add_argument("--wait", type=float, default=0, help="รอจนถึงเป้าหมาย ไม่เกินเวลานี้ (วินาที)")
+    p.set_defaults(func=cmd_move)
+
+    p = sub.add_parser("path", help="เคลื่อนที่ตามเส้นทางในไฟล์ข้อความหรือคลังเส้นทางเป็นโปรแกรมเดียว")
+    p.add_argument("target", help="ไฟล์ข้อความ หรือชื่อเส้นทางเมื่อใช้ --library")
+    p.add_argument("-L", "--library", help="ไฟล์คลังเส้นทาง .urwp (ใช้ a/v/blend ที่เก็บไว้ในคลัง)")
+    p.add_argument("-a", type=float, default=1.2)
+    p.add_argument("-v", type=float, default=0.11)
+    p.add_argument("--blend", type=float, default=0.0, help="blend radius (เมตร)")
+    p.add_argument("--auto-blend", type=float, metavar="TOL",
+                   help="คำนวณ blend radius ที่ใหญ่ที่สุดของแต่ละมุม โดยเบี่ยงจากมุมไม่เกิน TOL เมตร")
+    p.add_argument("--timeout", type=float, help="เวลารอสูงสุด (วินาที) ไม่ระบุคือประมาณจากระยะทาง")
+    p.set_defaults(func=cmd_path)
+
+    p = sub.add_parser("sweep", help="ค้นหา a/v/blend ของเส้นทาง คืน Pareto front ของเวลากับ objective")
+    p.add_argument("target", help="ไฟล์ข้อความ หรือชื่อเส้นทางเมื่อใช้ --library")
+    p.add_argument("-L", "--library", help="ไฟล์คลังเส้นทาง .urwp")
+    p.add_argument("-a", type=float, nargs=3, default=(0.3, 2.0, 8), metavar=("LO", "HI", "N"))
+    p.add_argument("-v", type=float, nargs=3, default=(0.05, 0.5, 10), metavar=("LO", "HI", "N"))
+    p.add_argument("--blend", type=float, nargs=3, default=(0.0, 0.05, 6), metavar=("LO", "HI", "N"))
+    p.add_argument("--random", type=int, metavar="N", help="สุ่ม N ชุดในช่วง LO-HI แทน grid")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--objective", default="deviation",
+                   choices=("deviation", "peak_speed", "peak_joint_speed"),
+                   help="peak_joint_speed ต้องใช้กับ --sim")
+    p.add_argument("--workers", type=int, help="จำนวน process (ค่าเริ่มต้นเท่าจำนวน CPU)")
+    p.add_argument("--sim", action="append", default=[], metavar="IP[:PORT:RT_PORT]",
+                   help="วัดจริงบน URSim เครื่องนี้ (ระบุซ้ำได้ หนึ่ง process ต่อเครื่อง) แทนการประมาณ")
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser("grip", help="สั่ง gripper (ไม่ระบุ width คืออ่านความกว้าง)")
+    p.add_argument("width", type=float, nargs="?")
+    p.add_argument("--force", type=float, default=40.0)
+    p.add_argument("--id", type=int, default=0)
+    p.set_defaults(func=cmd_grip)
+
+    p = sub.add_parser("pose", help="อ่านตำแหน่งปัจจุบัน")
+    p.add_argument("--watch", action="store_true")
+    p.add_argument("--interval", type=float, default=0.5)
+    p.set_defaults(func=cmd_pose)
+
+    p = sub.add_parser("record", help="บันทึกข้อมูลสถานะเป็น CSV")
+    p.add_argument("out")
+    p.add_argument("--duration", type=float, default=10.0)
+    p.add_argument("--decimate", type=int, default=1, help="บันทึกทุก N packet")
+    p.add_argument("--archive", action="store_true",
+                   help="บันทึกลงคลังข้อมูลระยะยาว (out เป็นไดเรกทอรี) แทน CSV")
+    p.set_defaults(func=cmd_record)
+
+    p = sub.add_parser("bench", help="วัดเวลาเริ่มต้นของคำสั่งและเวลา import")
+    p.add_argument("--runs", type=int, default=5)
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        import urMetrics
+        urMetrics.serve(args.metrics)
+    if args.trace:
+        import atexit
+        import urTrace
+        urTrace.enable(True)
+        atexit.register(urTrace.dump, args.trace)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
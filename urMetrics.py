@@ -0,0 +1,201 @@
+import threading
+import time
+from bisect import bisect_left
+
+# เปิด/ปิดการเก็บข้อมูลทั้งหมด เมื่อปิด start() จะคืน 0.0 และ observe()/inc() จะออกทันที
+ENABLED = False
+
+# ขอบเขตของ bucket (วินาที) ใช้ร่วมกันทุก histogram เพื่อให้จองหน่วยความจำครั้งเดียวตอนสร้าง
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        """
+        Histogram แบบจองช่องไว้ล่วงหน้า (ไม่มีการสร้าง object ใหม่ระหว่างบันทึก)
+
+        Args:
+            name (str): ชื่อ metric
+            help_text (str): คำอธิบายที่แสดงใน endpoint
+            buckets (tuple): ขอบบนของแต่ละ bucket เรียงจากน้อยไปมาก
+        """
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # ช่องสุดท้ายคือ +Inf
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.total += value
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            for i in range(len(self.counts)):
+                self.counts[i] = 0
+            self.total = 0.0
+            self.count = 0
+
+    def render(self):
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.total, self.count
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f"{self.name}_sum {total}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        with self._lock:
+            self.value = 0
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter",
+                f"{self.name} {self.value}"]
+
+
+# metric ทั้งหมดถูกสร้างครั้งเดียวตอน import เพื่อไม่ให้มีการค้นหา/สร้างใน hot path
+HISTOGRAMS = {
+    h.name: h for h in (
+        Histogram("ur_send_seconds", "เวลาที่ใช้ส่งคำสั่ง URScript ผ่าน socket"),
+        Histogram("ur_state_staleness_seconds", "อายุของข้อมูลสถานะ ณ เวลาที่ส่งให้ผู้เรียก"),
+        Histogram("ur_pose_read_seconds", "เวลาที่ใช้อ่านตำแหน่งปัจจุบัน"),
+        Histogram("rg_xmlrpc_seconds", "เวลาไป-กลับของคำสั่ง XML-RPC ไปยัง gripper"),
+        Histogram("ur_move_wait_seconds", "เวลาที่รอให้แขนกลเคลื่อนที่เสร็จในแต่ละครั้ง"),
+        Histogram("ur_downtime_seconds", "เวลาตั้งแต่ตรวจพบการเชื่อมต่อขาดจนเชื่อมต่อใหม่ครบทุกช่องทาง"),
+        Histogram("rg_state_staleness_seconds", "อายุของสถานะ gripper ใน cache ณ เวลาที่ส่งให้ผู้เรียก"),
+    )
+}
+
+COUNTERS = {
+    c.name: c for c in (
+        Counter("ur_commands_total", "จำนวนคำสั่ง URScript ที่ส่งสำเร็จ"),
+        Counter("ur_send_errors_total", "จำนวนครั้งที่ส่งคำสั่งล้มเหลว"),
+        Counter("ur_pose_read_errors_total", "จำนวนครั้งที่อ่านตำแหน่งล้มเหลวทุกวิธี"),
+        Counter("ur_reconnects_total", "จำนวนครั้งที่เชื่อมต่อใหม่หลังจากเคยเชื่อมต่อแล้ว"),
+        Counter("rg_xmlrpc_errors_total", "จำนวนครั้งที่คำสั่ง XML-RPC ไปยัง gripper ล้มเหลว"),
+        Counter("ur_contact_stops_total", "จำนวนครั้งที่ตัวตรวจจับการชนสั่งหยุดแขนกล"),
+        Counter("ur_disconnects_total", "จำนวนครั้งที่ตรวจพบการเชื่อมต่อขาด"),
+        Counter("ur_reconnect_attempts_total", "จำนวนครั้งที่พยายามเชื่อมต่อใหม่ (รวมที่ล้มเหลว)"),
+    )
+}
+
+
+def enable(flag=True):
+    """เปิดหรือปิดการเก็บ metric ทั้งหมด"""
+    global ENABLED
+    ENABLED = flag
+
+
+def start():
+    """
+    เริ่มจับเวลา
+
+    Returns:
+        float: เวลาเริ่มต้น หรือ 0.0 ถ้าปิดการเก็บข้อมูลอยู่
+    """
+    if not ENABLED:
+        return 0.0
+    return time.perf_counter()
+
+
+def observe(name, t0):
+    """บันทึกเวลาที่ผ่านไปตั้งแต่ t0 ลงใน histogram (ไม่ทำอะไรถ้า t0 เป็น 0.0)"""
+    if t0:
+        HISTOGRAMS[name].observe(time.perf_counter() - t0)
+
+
+def observe_value(name, value):
+    """บันทึกค่าที่คำนวณไว้แล้วลงใน histogram"""
+    if ENABLED:
+        HISTOGRAMS[name].observe(value)
+
+
+def inc(name, amount=1):
+    """เพิ่มค่า counter"""
+    if ENABLED:
+        COUNTERS[name].inc(amount)
+
+
+def reset():
+    """ล้างค่าทั้งหมด (ใช้ระหว่าง benchmark)"""
+    for h in HISTOGRAMS.values():
+        h.reset()
+    for c in COUNTERS.values():
+        c.reset()
+
+
+def render():
+    """
+    สร้างข้อความในรูปแบบ text exposition ของ Prometheus
+
+    Returns:
+        str: metric ทั้งหมด
+    """
+    lines = []
+    for h in HISTOGRAMS.values():
+        lines.extend(h.render())
+    for c in COUNTERS.values():
+        lines.extend(c.render())
+    return "\n".join(lines) + "\n"
+
+
+def serve(port=9108, host="127.0.0.1"):
+    """
+    เปิด endpoint สำหรับอ่าน metric ที่ http://host:port/metrics ใน background thread
+    และเปิดการเก็บข้อมูลโดยอัตโนมัติ
+
+    Args:
+        port (int): พอร์ตของ endpoint
+        host (str): ค่าเริ่มต้นคือ 127.0.0.1 เพื่อให้เข้าถึงได้เฉพาะเครื่องนี้
+
+    Returns:
+        ThreadingHTTPServer: เรียก shutdown() เพื่อปิด
+    """
+    # import เมื่อใช้งานจริงเท่านั้น เพราะ http.server ทำให้ import ช้าลงหลายสิบ ms
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # ไม่พิมพ์ log ของทุก request
+            pass
+
+    enable(True)
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="ur-metrics", daemon=True)
+    thread.start()
+    return server
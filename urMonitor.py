@@ -0,0 +1,197 @@
+import math
+import threading
+
+import urMetrics
+import urTrace
+
+
+class ContactEvent:
+    """รายละเอียดของเหตุการณ์ที่ทำให้ตัวตรวจจับสั่งหยุดแขนกล"""
+    __slots__ = ("kind", "joint", "value", "limit", "timestamp", "trajectory")
+
+    def __init__(self, kind, joint, value, limit, timestamp, trajectory):
+        self.kind = kind              # "current", "baseline" หรือ "force"
+        self.joint = joint            # หมายเลขข้อต่อ (0-5) หรือ None สำหรับแรงที่ปลายแขน
+        self.value = value
+        self.limit = limit
+        self.timestamp = timestamp    # เวลาของ controller จาก packet
+        self.trajectory = trajectory
+
+    def __repr__(self):
+        where = "TCP" if self.joint is None else f"joint {self.joint}"
+        return f"ContactEvent({self.kind}, {where}, value={self.value:.3f}, limit={self.limit:.3f})"
+
+
+class CurrentBaseline:
+    def __init__(self, window=25):
+        """
+        ค่ากระแสของแต่ละข้อต่อที่เรียนรู้จากการเคลื่อนที่ปกติของ trajectory หนึ่ง
+        เก็บเป็นขอบล่าง/ขอบบนตามลำดับ packet นับจากเริ่ม trajectory
+
+        Args:
+            window (int): จำนวน packet ก่อน/หลังที่ใช้ขยายขอบ เพื่อรองรับเวลาที่คลาดเคลื่อนเล็กน้อยระหว่างรอบ
+        """
+        self.window = window
+        self.low = []
+        self.high = []
+        self._samples = []
+
+    def record(self, current):
+        self._samples.append(current)
+
+    def finish(self):
+        """สร้างขอบจากข้อมูลที่บันทึก และรวมกับขอบเดิม (ถ้าเคยเรียนรู้มาแล้ว)"""
+        samples = self._samples
+        self._samples = []
+        if not samples:
+            return
+        n = len(samples)
+        low, high = [], []
+        for i in range(n):
+            chunk = samples[max(0, i - self.window):min(n, i + self.window + 1)]
+            low.append(tuple(min(s[j] for s in chunk) for j in range(6)))
+            high.append(tuple(max(s[j] for s in chunk) for j in range(6)))
+        if self.low:
+            # ส่วนที่เกินของรอบที่ยาวกว่า (รอบเดิมหรือรอบใหม่) ยังใช้ต่อ
+            m = min(len(self.low), n)
+            low = [tuple(map(min, self.low[i], low[i])) for i in range(m)] + (low[m:] or self.low[m:])
+            high = [tuple(map(max, self.high[i], high[i])) for i in range(m)] + (high[m:] or self.high[m:])
+        self.low, self.high = low, high
+
+    def bounds(self, index):
+        """ขอบล่าง/ขอบบนที่ลำดับ packet index (เกินความยาวใช้ค่าสุดท้าย)"""
+        index = min(index, len(self.low) - 1)
+        return self.low[index], self.high[index]
+
+
+class ContactMonitor:
+    def __init__(self, robot, current_limits=None, force_limit=None, margin=0.5,
+                 consecutive=2, stop_acceleration=3.0):
+        """
+        ตรวจจับการติดขัดหรือการชนจากกระแสของข้อต่อและแรงที่ปลายแขนที่ได้รับจาก state stream
+        แล้วสั่ง stopj ทันทีบน thread ที่อ่านข้อมูล
+
+        Args:
+            robot (UR3Controller): ต้องเรียก start_state_stream() ก่อน attach()
+            current_limits (list): ค่ากระแสสูงสุดของแต่ละข้อต่อ (A) - None คือไม่ตรวจ
+            force_limit (float): ขนาดแรงที่ปลายแขนสูงสุด (N) - None คือไม่ตรวจ
+            margin (float): กระแสที่ยอมให้เกินขอบที่เรียนรู้ไว้ (A)
+            consecutive (int): จำนวน packet ติดกันที่ต้องเกินค่าก่อนสั่งหยุด (1-2 รอบควบคุม)
+            stop_acceleration (float): ความเร่งที่ใช้กับ stopj (rad/s^2)
+        """
+        self.robot = robot
+        self.current_limits = current_limits
+        self.force_limit = force_limit
+        self.margin = margin
+        self.consecutive = consecutive
+        self.stop_acceleration = stop_acceleration
+        self.baselines = {}
+        self.tripped = threading.Event()
+        self.event = None
+        self._callbacks = []
+        self._trajectory = None
+        self._learning = None
+        self._index = 0
+        self._violations = 0
+        self._stream = None
+
+    def on_trip(self, callback):
+        """ลงทะเบียนฟังก์ชันที่จะถูกเรียกเมื่อสั่งหยุด (รับ ContactEvent หนึ่งตัว)"""
+        self._callbacks.append(callback)
+
+    def attach(self):
+        """เริ่มตรวจข้อมูลจาก state stream ของ robot"""
+        stream = self.robot.state_stream
+        if stream is None:
+            raise RuntimeError("ต้องเรียก robot.start_state_stream() ก่อน")
+        stream.subscribe(self._check)
+        self._stream = stream
+
+    def detach(self):
+        if self._stream:
+            self._stream.unsubscribe(self._check)
+            self._stream = None
+
+    def start_trajectory(self, name, learn=False):
+        """
+        เริ่มนับลำดับ packet ของ trajectory ใหม่
+
+        Args:
+            name (str): ชื่อ trajectory (ใช้เลือก baseline)
+            learn (bool): True คือบันทึกกระแสเป็น baseline แทนการเปรียบเทียบกับ baseline
+                (ยังตรวจ current_limits และ force_limit ตามปกติ)
+        """
+        self._index = 0
+        self._violations = 0
+        self._trajectory = name
+        self._learning = self.baselines.setdefault(name, CurrentBaseline()) if learn else None
+
+    def end_trajectory(self):
+        if self._learning is not None:
+            self._learning.finish()
+        self._learning = None
+        self._trajectory = None
+
+    def reset(self):
+        """ล้างสถานะการหยุด เพื่อให้สั่งเคลื่อนที่และ wait() ได้อีกครั้ง"""
+        self.tripped.clear()
+        self.robot.abort_event.clear()
+        self.event = None
+        self._violations = 0
+
+    def _check(self, state):
+        if self.tripped.is_set():
+            return
+        index = self._index
+        self._index = index + 1
+        current = state.current
+
+        # ระหว่างเรียนรู้ยังตรวจขีดจำกัดกระแสและแรงแบบค่าคงที่ เพียงไม่เทียบกับ baseline
+        learning = self._learning
+        if learning is not None:
+            learning.record(current)
+        event = self._evaluate(state, current, index, learning is None)
+
+        if event is None:
+            self._violations = 0
+            return
+        self._violations += 1
+        if self._violations >= self.consecutive:
+            self._trip(event)
+
+    def _evaluate(self, state, current, index, use_baseline=True):
+        limits = self.current_limits
+        if limits is not None:
+            for j in range(6):
+                if abs(current[j]) > limits[j]:
+                    return ContactEvent("current", j, current[j], limits[j], state.timestamp, self._trajectory)
+
+        baseline = self.baselines.get(self._trajectory) if use_baseline else None
+        if baseline is not None and baseline.low:
+            low, high = baseline.bounds(index)
+            margin = self.margin
+            for j in range(6):
+                if current[j] > high[j] + margin:
+                    return ContactEvent("baseline", j, current[j], high[j] + margin, state.timestamp, self._trajectory)
+                if current[j] < low[j] - margin:
+                    return ContactEvent("baseline", j, current[j], low[j] - margin, state.timestamp, self._trajectory)
+
+        if self.force_limit is not None:
+            fx, fy, fz = state.tcp_force[0:3]
+            force = math.sqrt(fx * fx + fy * fy + fz * fz)
+            if force > self.force_limit:
+                return ContactEvent("force", None, force, self.force_limit, state.timestamp, self._trajectory)
+        return None
+
+    def _trip(self, event):
+        # สั่งหยุดก่อนทำอย่างอื่นทั้งหมด
+        self.robot.stop(self.stop_acceleration)
+        self.robot.abort_event.set()
+        self.event = event
+        self.tripped.set()
+        urMetrics.inc("ur_contact_stops_total")
+        urTrace.instant("contact_stop", "monitor", {"kind": event.kind, "joint": event.joint,
+                                                    "value": event.value})
+        print(f"ตรวจพบการชน/ติดขัด สั่งหยุดแขนกลแล้ว: {event}")
+        for callback in list(self._callbacks):
+            callback(event)
@@ -0,0 +1,213 @@
+import socket
+import threading
+import time
+
+import urMetrics
+import urTrace
+from urState import StateStream
+
+DASHBOARD_PORT = 29999
+GRIPPER_PORT = 41414
+
+
+class URSession:
+    def __init__(self, robot, heartbeat_timeout=0.1, connect_timeout=0.5, backoff_start=0.005,
+                 backoff_max=1.0, dashboard=True, gripper=False):
+        """
+        ดูแลการเชื่อมต่อทุกช่องทางกับแขนกล ตรวจจับการเชื่อมต่อขาดจาก heartbeat ของ state stream
+        (ไม่มี packet เข้ามาภายใน heartbeat_timeout) หรือจากการส่งคำสั่งไม่สำเร็จ แล้วเชื่อมต่อใหม่อัตโนมัติ
+
+        Args:
+            robot (UR3Controller): แขนกลที่จะดูแล
+            heartbeat_timeout (float): เวลาที่ไม่มี packet แล้วถือว่าการเชื่อมต่อขาด (วินาที)
+                e-Series ส่ง 500 Hz, CB-series ส่ง 125 Hz
+            connect_timeout (float): เวลารอการเชื่อมต่อแต่ละช่องทาง (วินาที)
+            backoff_start (float): เวลารอก่อนลองใหม่ครั้งแรก จะเพิ่มเป็นสองเท่าทุกครั้งที่ล้มเหลว (วินาที)
+            backoff_max (float): เวลารอสูงสุดระหว่างการลองใหม่ (วินาที)
+            dashboard (bool): เปิดการเชื่อมต่อกับ Dashboard Server (29999) ค้างไว้
+            gripper (bool): ตรวจว่าเข้าถึง XML-RPC ของ gripper (41414) ได้ก่อนถือว่าเชื่อมต่อครบ
+        """
+        self.robot = robot
+        self.heartbeat_timeout = heartbeat_timeout
+        self.connect_timeout = connect_timeout
+        self.backoff_start = backoff_start
+        self.backoff_max = backoff_max
+        self.use_dashboard = dashboard
+        self.use_gripper = gripper
+        self.dashboard_socket = None
+        self.disconnects = 0
+        self.last_downtime = 0.0
+        self.total_downtime = 0.0
+        self._connected = threading.Event()
+        self._lost = threading.Event()
+        self._closing = False
+        self._lost_at = None
+        self._dashboard_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._thread = None
+        self._watched_stream = None
+        self._command_failed = False
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def start(self):
+        """
+        เชื่อมต่อทุกช่องทางและเริ่ม thread ที่ดูแลการเชื่อมต่อ
+
+        Returns:
+            bool: True ถ้าเชื่อมต่อครบในครั้งแรก (ถ้าไม่สำเร็จ thread จะพยายามต่อไปเรื่อย ๆ)
+        """
+        self._closing = False
+        self._lost.clear()
+        self._lost_at = None
+        self.robot.connect_timeout = self.connect_timeout
+        self.robot.on_send_error = self._send_failed
+        ok = self._connect_all()
+        with self._state_lock:
+            if ok and not self._lost.is_set():
+                self._connected.set()
+        if not ok:
+            self._connection_lost(None)
+        self._thread = threading.Thread(target=self._supervise, name="ur-session", daemon=True)
+        self._thread.start()
+        return ok
+
+    def close(self):
+        """หยุดดูแลการเชื่อมต่อและปิดทุกช่องทาง"""
+        self._closing = True
+        self._lost.set()
+        if self._thread:
+            self._thread.join(self.backoff_max + self.connect_timeout)
+            self._thread = None
+        self.robot.on_send_error = None
+        self._close_dashboard()
+        self.robot.disconnect()
+        self._connected.clear()
+
+    def wait_connected(self, timeout=None):
+        """
+        รอจนกว่าจะเชื่อมต่อครบทุกช่องทาง
+
+        Returns:
+            bool: False ถ้าหมดเวลา
+        """
+        return self._connected.wait(timeout)
+
+    def dashboard(self, command):
+        """
+        ส่งคำสั่งไปยัง Dashboard Server ผ่านการเชื่อมต่อที่เปิดค้างไว้
+
+        Args:
+            command (str): เช่น "robotmode", "safetystatus", "unlock protective stop"
+
+        Returns:
+            str: คำตอบ หรือ None ถ้าไม่ได้เชื่อมต่อ
+        """
+        with self._dashboard_lock:
+            sock = self.dashboard_socket
+            if sock is None:
+                return None
+            try:
+                sock.sendall((command + "\n").encode('utf-8'))
+                return sock.recv(1024).decode('utf-8', errors='replace').strip()
+            except OSError as e:
+                self._connection_lost(e)
+                return None
+
+    def _send_failed(self, error):
+        # socket คำสั่งที่ส่งไม่สำเร็จอาจยังดูเหมือนเชื่อมต่ออยู่ จึงบังคับให้เปิดใหม่
+        self._command_failed = True
+        self._connection_lost(error)
+
+    def _connection_lost(self, error):
+        with self._state_lock:
+            if self._closing or self._lost.is_set():
+                return
+            if self._connected.is_set() or self._lost_at is None:
+                self._lost_at = time.perf_counter()
+            self._connected.clear()
+            self._lost.set()
+        self.disconnects += 1
+        urMetrics.inc("ur_disconnects_total")
+        urTrace.instant("connection_lost", "session", {"error": str(error)})
+        print(f"การเชื่อมต่อกับ {self.robot.host} ขาด: {error}")
+
+    def _supervise(self):
+        while True:
+            self._lost.wait()
+            if self._closing:
+                return
+            delay = self.backoff_start
+            with urTrace.span("reconnect", "session"):
+                while not self._closing:
+                    # ล้างก่อนเชื่อมต่อ เพื่อให้การขาดซ้ำระหว่าง _connect_all ถูกตรวจพบและลองใหม่
+                    self._lost.clear()
+                    urMetrics.inc("ur_reconnect_attempts_total")
+                    if self._connect_all():
+                        with self._state_lock:
+                            if not self._lost.is_set() and not self._closing:
+                                self._connected.set()
+                                break
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.backoff_max)
+            if self._closing:
+                return
+            downtime = time.perf_counter() - self._lost_at
+            self.last_downtime = downtime
+            self.total_downtime += downtime
+            urMetrics.observe_value("ur_downtime_seconds", downtime)
+            print(f"เชื่อมต่อใหม่สำเร็จ หลังขาดไป {downtime * 1000:.0f} ms")
+
+    def _connect_all(self):
+        robot = self.robot
+        # 30002: ช่องทางส่งคำสั่ง - socket ที่ยังใช้ได้ไม่ต้องเปิดใหม่ (เช่น robot ที่เชื่อมต่อไว้ก่อน start())
+        # ลองใหม่ถี่ตาม backoff จึงไม่พิมพ์ข้อความทุกครั้งที่ล้มเหลว
+        if self._command_failed or not robot.is_connected():
+            if not robot.connect(quiet=True):
+                return False
+            self._command_failed = False
+
+        # 30003: state stream ใช้ object เดิมเพื่อให้ผู้รับข้อมูลที่ลงทะเบียนไว้ (เช่น ContactMonitor) ยังอยู่ครบ
+        stream = robot.state_stream
+        if stream is not None and stream.running:
+            # stream ที่เริ่มไว้ก่อน start() ของ session ต้องใช้ heartbeat_timeout เช่นกัน
+            stream.set_timeout(self.heartbeat_timeout)
+        else:
+            if stream is None:
+                stream = StateStream(robot.host, robot.rt_port, self.heartbeat_timeout)
+            stream.timeout = self.heartbeat_timeout
+            try:
+                stream.start()
+            except OSError:
+                return False
+            robot.state_stream = stream
+        if stream is not self._watched_stream:
+            stream.on_disconnect(self._connection_lost)
+            self._watched_stream = stream
+
+        # 29999: Dashboard Server
+        if self.use_dashboard:
+            self._close_dashboard()
+            try:
+                sock = socket.create_connection((robot.host, DASHBOARD_PORT), self.connect_timeout)
+                sock.recv(1024)  # ข้อความต้อนรับ
+            except OSError:
+                return False
+            with self._dashboard_lock:
+                self.dashboard_socket = sock
+
+        # 41414: XML-RPC ของ gripper เป็น HTTP ที่เปิดใหม่ทุกคำสั่ง จึงตรวจแค่ว่าเข้าถึงได้
+        if self.use_gripper:
+            try:
+                socket.create_connection((robot.host, GRIPPER_PORT), self.connect_timeout).close()
+            except OSError:
+                return False
+        return True
+
+    def _close_dashboard(self):
+        with self._dashboard_lock:
+            if self.dashboard_socket is not None:
+                self.dashboard_socket.close()
+                self.dashboard_socket = None
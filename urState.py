@@ -0,0 +1,225 @@
+import socket
+import struct
+import threading
+import time
+
+import urMetrics
+import urTrace
+
+# ตำแหน่ง (byte offset) ของข้อมูลใน packet ของพอร์ต 30003 (Real-time interface)
+# ข้อมูลแต่ละตัวเป็น double (8 ไบต์) แบบ big-endian
+OFFSET_TIME = 4
+OFFSET_Q_TARGET = 12
+OFFSET_Q_ACTUAL = 252
+OFFSET_QD_ACTUAL = 300
+OFFSET_I_ACTUAL = 348
+OFFSET_TCP_POSE = 444
+OFFSET_TCP_SPEED = 492
+OFFSET_TCP_FORCE = 540
+OFFSET_DIGITAL_INPUTS = 684
+OFFSET_ROBOT_MODE = 756
+OFFSET_SAFETY_MODE = 812
+OFFSET_DIGITAL_OUTPUTS = 1044
+OFFSET_PROGRAM_STATE = 1052
+
+MIN_PACKET_SIZE = 1060
+
+_VEC6 = struct.Struct('!6d')
+_DOUBLE = struct.Struct('!d')
+_SIZE = struct.Struct('!i')
+
+
+class RealtimeState:
+    """ข้อมูลสถานะของแขนกลจาก packet เดียว (ค่าเป็น tuple ของ float)"""
+    __slots__ = ("timestamp", "q", "qd", "current", "tcp_pose", "tcp_speed", "tcp_force",
+                 "digital_inputs", "digital_outputs", "robot_mode", "safety_mode",
+                 "program_state", "received")
+
+    def age(self):
+        """เวลาที่ผ่านไปตั้งแต่ได้รับ packet นี้ (วินาที)"""
+        return time.perf_counter() - self.received
+
+
+def parse_packet(data, received=None):
+    """
+    แปลง packet จากพอร์ต 30003 เป็น RealtimeState
+
+    Args:
+        data (bytes): packet ทั้งก้อน รวม 4 ไบต์แรกที่เป็นขนาด
+        received (float): เวลา perf_counter ที่ได้รับ packet - None คือเวลาปัจจุบัน
+
+    Returns:
+        RealtimeState: หรือ None ถ้าข้อมูลไม่ครบ
+    """
+    if len(data) < MIN_PACKET_SIZE:
+        return None
+    s = RealtimeState()
+    s.timestamp = _DOUBLE.unpack_from(data, OFFSET_TIME)[0]
+    s.q = _VEC6.unpack_from(data, OFFSET_Q_ACTUAL)
+    s.qd = _VEC6.unpack_from(data, OFFSET_QD_ACTUAL)
+    s.current = _VEC6.unpack_from(data, OFFSET_I_ACTUAL)
+    s.tcp_pose = _VEC6.unpack_from(data, OFFSET_TCP_POSE)
+    s.tcp_speed = _VEC6.unpack_from(data, OFFSET_TCP_SPEED)
+    s.tcp_force = _VEC6.unpack_from(data, OFFSET_TCP_FORCE)
+    s.digital_inputs = int(_DOUBLE.unpack_from(data, OFFSET_DIGITAL_INPUTS)[0])
+    s.robot_mode = int(_DOUBLE.unpack_from(data, OFFSET_ROBOT_MODE)[0])
+    s.safety_mode = int(_DOUBLE.unpack_from(data, OFFSET_SAFETY_MODE)[0])
+    s.digital_outputs = int(_DOUBLE.unpack_from(data, OFFSET_DIGITAL_OUTPUTS)[0])
+    s.program_state = int(_DOUBLE.unpack_from(data, OFFSET_PROGRAM_STATE)[0])
+    s.received = time.perf_counter() if received is None else received
+    return s
+
+
+class StateStream:
+    def __init__(self, host, port=30003, timeout=1.0):
+        """
+        อ่านข้อมูลสถานะจากพอร์ต 30003 อย่างต่อเนื่องใน background thread
+        (125 Hz สำหรับ CB-series, 500 Hz สำหรับ e-Series)
+
+        Args:
+            host (str): IP address ของแขนกล
+            port (int): พอร์ต Real-time interface
+            timeout (float): ถ้าไม่ได้รับ packet ภายในเวลานี้จะถือว่าการเชื่อมต่อขาด (วินาที)
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.latest = None
+        self.packets = 0
+        self._subscribers = []
+        self._on_disconnect = []
+        self._socket = None
+        self._thread = None
+        self._running = False
+        self._update = threading.Condition()
+
+    def subscribe(self, callback):
+        """
+        ลงทะเบียนฟังก์ชันที่จะถูกเรียกทุกครั้งที่ได้รับ packet ใหม่ (เรียกบน thread ที่อ่านข้อมูล
+        จึงควรทำงานให้เสร็จเร็ว)
+
+        Args:
+            callback (callable): รับ RealtimeState หนึ่งตัว
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def on_disconnect(self, callback):
+        """ลงทะเบียนฟังก์ชันที่จะถูกเรียกเมื่อการเชื่อมต่อขาด (รับ exception หนึ่งตัว)"""
+        self._on_disconnect.append(callback)
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """
+        เชื่อมต่อและเริ่มอ่านข้อมูล เรียกซ้ำได้หลังการเชื่อมต่อขาด โดยผู้รับข้อมูลที่ลงทะเบียนไว้ยังอยู่ครบ
+        """
+        if self._running:
+            return
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket = sock
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="ur-state", daemon=True)
+        self._thread.start()
+
+    def set_timeout(self, timeout):
+        """เปลี่ยนเวลาที่ไม่มี packet แล้วถือว่าการเชื่อมต่อขาด (มีผลทันทีแม้กำลังอ่านข้อมูลอยู่)"""
+        self.timeout = timeout
+        sock = self._socket
+        if sock is not None:
+            try:
+                sock.settimeout(timeout)
+            except OSError:
+                pass
+
+    def stop(self):
+        """หยุดอ่านข้อมูลและปิดการเชื่อมต่อ"""
+        self._running = False
+        if self._socket:
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+            self._socket = None
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(self.timeout)
+        self._thread = None
+
+    def get(self):
+        """
+        ข้อมูลสถานะล่าสุด
+
+        Returns:
+            RealtimeState: หรือ None ถ้ายังไม่ได้รับข้อมูล
+        """
+        state = self.latest
+        if state is not None and urMetrics.ENABLED:
+            urMetrics.observe_value("ur_state_staleness_seconds", state.age())
+        return state
+
+    def wait_for_update(self, timeout=None):
+        """
+        รอจนกว่าจะได้รับ packet ถัดไป
+
+        Returns:
+            RealtimeState: หรือ None ถ้าหมดเวลา
+        """
+        with urTrace.span("wait_for_update", "state"):
+            with self._update:
+                count = self.packets
+                if not self._update.wait_for(lambda: self.packets != count, timeout):
+                    return None
+                return self.latest
+
+    def _run(self):
+        sock = self._socket
+        header = bytearray(4)
+        buf = bytearray(2048)
+        error = None
+        try:
+            while self._running:
+                _recv_exact(sock, memoryview(header), 4)
+                size = _SIZE.unpack(header)[0]
+                if size < 4:
+                    raise ConnectionError(f"ขนาด packet ไม่ถูกต้อง: {size}")
+                if size > len(buf):
+                    buf = bytearray(size)
+                buf[0:4] = header
+                _recv_exact(sock, memoryview(buf)[4:size], size - 4)
+                state = parse_packet(memoryview(buf)[:size])
+                if state is None:
+                    continue
+                with self._update:
+                    self.latest = state
+                    self.packets += 1
+                    self._update.notify_all()
+                for callback in list(self._subscribers):
+                    try:
+                        callback(state)
+                    except Exception as e:
+                        print(f"ฟังก์ชันที่รับข้อมูลสถานะทำงานผิดพลาด: {e}")
+        except (OSError, ConnectionError) as e:
+            error = e
+        if self._running:
+            # การเชื่อมต่อขาดโดยที่ไม่ได้สั่งหยุด
+            self._running = False
+            sock.close()
+            print(f"การรับข้อมูลสถานะจาก {self.host}:{self.port} ขาด: {error}")
+            for callback in list(self._on_disconnect):
+                callback(error)
+
+
+def _recv_exact(sock, view, n):
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:], n - got)
+        if k == 0:
+            raise ConnectionError("แขนกลปิดการเชื่อมต่อ")
+        got += k
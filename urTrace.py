@@ -0,0 +1,179 @@
+import atexit
+import itertools
+import os
+import sys
+import threading
+import time
+
+# เปิด/ปิดการบันทึก event เมื่อปิด begin()/end()/span จะออกทันที
+ENABLED = False
+
+_capacity = 65536
+_buffer = [None] * _capacity
+# next() ของ itertools.count ทำงานแบบ atomic ภายใต้ GIL จึงใช้จองช่องใน ring buffer ได้โดยไม่ต้องล็อก
+_seq = itertools.count()
+
+
+def enable(flag=True, capacity=None):
+    """
+    เปิดหรือปิดการบันทึก event
+
+    Args:
+        flag (bool): True เพื่อเปิด
+        capacity (int): ขนาด ring buffer ใหม่ (ล้าง event เดิมทั้งหมด) - None คือใช้ขนาดเดิม
+    """
+    global ENABLED
+    if capacity is not None:
+        clear(capacity)
+    ENABLED = flag
+
+
+def clear(capacity=None):
+    """ล้าง event ทั้งหมดใน ring buffer"""
+    global _capacity, _buffer, _seq
+    if capacity is not None:
+        _capacity = capacity
+    _buffer = [None] * _capacity
+    _seq = itertools.count()
+
+
+def _track():
+    # แต่ละ asyncio task ได้ track ของตัวเอง เพราะ task ที่สลับกันบน thread เดียวกันทำให้ B/E ไม่ซ้อนกันอย่างถูกต้อง
+    # ถ้ายังไม่มีใคร import asyncio ก็ไม่มี task ให้ตรวจ (ไม่ต้องเสียเวลา import เอง)
+    asyncio = sys.modules.get("asyncio")
+    task = None
+    if asyncio is not None:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            pass
+    if task is not None:
+        return id(task), task.get_name()
+    thread = threading.current_thread()
+    return thread.ident, thread.name
+
+
+def _record(ph, name, cat, args):
+    tid, tname = _track()
+    seq = next(_seq)
+    _buffer[seq % _capacity] = (seq, ph, name, cat, time.perf_counter_ns() // 1000, tid, tname, args)
+
+
+def begin(name, cat="ur", args=None):
+    """บันทึกจุดเริ่มของช่วงเวลา (ต้องปิดด้วย end() ชื่อเดียวกันบน thread/task เดียวกัน)"""
+    if ENABLED:
+        _record("B", name, cat, args)
+
+
+def end(name, cat="ur", args=None):
+    """บันทึกจุดสิ้นสุดของช่วงเวลา"""
+    if ENABLED:
+        _record("E", name, cat, args)
+
+
+def instant(name, cat="ur", args=None):
+    """บันทึก event ที่ไม่มีช่วงเวลา เช่น การหยุดฉุกเฉิน"""
+    if ENABLED:
+        _record("i", name, cat, args)
+
+
+class span:
+    """
+    บันทึก begin/end รอบบล็อกของโค้ด
+
+    ตัวอย่าง:
+        with urTrace.span("movel", "arm"):
+            robot.move_linear(...)
+    """
+    __slots__ = ("name", "cat", "args", "active")
+
+    def __init__(self, name, cat="ur", args=None):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.active = False
+
+    def __enter__(self):
+        if ENABLED:
+            self.active = True
+            _record("B", self.name, self.cat, self.args)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.active:
+            _record("E", self.name, self.cat, {"error": exc_type.__name__} if exc_type else None)
+        return False
+
+
+def sleep(seconds, name="sleep"):
+    """time.sleep ที่บันทึกเป็นช่วงเวลาใน trace"""
+    with span(name, "sleep", {"seconds": seconds}):
+        time.sleep(seconds)
+
+
+async def async_sleep(seconds, name="sleep"):
+    """asyncio.sleep ที่บันทึกเป็นช่วงเวลาใน trace"""
+    import asyncio
+    with span(name, "sleep", {"seconds": seconds}):
+        await asyncio.sleep(seconds)
+
+
+def events():
+    """
+    ดึง event ที่ยังอยู่ใน ring buffer เรียงตามลำดับที่เกิด
+
+    Returns:
+        list: tuple (seq, ph, name, cat, ts_us, tid, thread_name, args)
+    """
+    return sorted((e for e in list(_buffer) if e is not None), key=lambda e: e[0])
+
+
+def to_chrome_trace():
+    """
+    แปลง event เป็นรูปแบบ Chrome trace / Perfetto (JSON object format)
+
+    Returns:
+        dict: พร้อมสำหรับ json.dump
+    """
+    pid = os.getpid()
+    out = []
+    names = {}
+    depth = {}
+    for _, ph, name, cat, ts, tid, tname, args in events():
+        if tid not in names:
+            names[tid] = tname
+            out.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                        "args": {"name": tname}})
+        if ph == "E":
+            # ตัด E ที่ B ถูกเขียนทับไปแล้วเมื่อ ring buffer วนรอบ
+            if not depth.get(tid):
+                continue
+            depth[tid] -= 1
+        elif ph == "B":
+            depth[tid] = depth.get(tid, 0) + 1
+        event = {"ph": ph, "name": name, "cat": cat, "ts": ts, "pid": pid, "tid": tid}
+        if ph == "i":
+            event["s"] = "t"
+        if args:
+            event["args"] = args
+        out.append(event)
+    return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+
+def dump(path):
+    """
+    เขียน trace ลงไฟล์ เปิดดูได้ที่ chrome://tracing หรือ https://ui.perfetto.dev
+
+    Args:
+        path (str): ไฟล์ปลายทาง (.json)
+    """
+    import json
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_chrome_trace(), f)
+    print(f"บันทึก trace ไว้ที่ {path}")
+
+
+# ตั้งค่า UR_TRACE=ไฟล์.json เพื่อเปิด trace ตั้งแต่เริ่มโปรแกรมและบันทึกเมื่อโปรแกรมจบ
+if os.environ.get("UR_TRACE"):
+    enable(True)
+    atexit.register(dump, os.environ["UR_TRACE"])
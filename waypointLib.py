@@ -0,0 +1,225 @@
+"""
+ไฟล์คลังจุด/เส้นทาง (.urwp) แบบไบนารีพร้อมดัชนีชื่อ
+
+เปิดไฟล์ด้วย mmap และอ่านเฉพาะเส้นทางที่ขอ จึงเก็บเส้นทางได้หลายพันรายการโดยไม่ต้องแปลงข้อมูลทั้งไฟล์
+จุดเดี่ยวเก็บเป็นเส้นทางที่มีจุดเดียว
+
+โครงสร้างไฟล์ (little-endian):
+    header 32 ไบต์: magic "URWP", version, จำนวนเส้นทาง, offset ของดัชนี, offset ของตารางชื่อ
+    ข้อมูล: แต่ละเส้นทางเป็น [x, y, z, rx, ry, rz] * n (double) ตามด้วยชนิดการเคลื่อนที่ n ไบต์
+    ดัชนี: รายการขนาด 48 ไบต์ต่อเส้นทาง เรียงตามชื่อ (ค้นหาแบบ binary search)
+    ตารางชื่อ: ชื่อทั้งหมดแบบ UTF-8 ต่อกัน
+
+    python waypointLib.py build คลัง.urwp เส้นทาง1.txt เส้นทาง2.txt ...
+    python waypointLib.py list คลัง.urwp
+"""
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"URWP"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHIQQ4x")
+_ENTRY = struct.Struct("<IHHI4xQddd")
+_POSE = struct.Struct("<6d")
+
+KINDS = ("movel", "movej")
+
+
+class WaypointPath:
+    def __init__(self, name, poses, kinds=None, a=1.2, v=0.25, r=0.0, radii=None):
+        """
+        เส้นทางหนึ่งเส้น
+
+        Args:
+            name (str): ชื่อเส้นทาง
+            poses (list): [x, y, z, rx, ry, rz] ของแต่ละจุด
+            kinds (list): "movel" หรือ "movej" ของแต่ละจุด - None คือ movel ทุกจุด
+            a (float): ความเร่ง (m/s^2)
+            v (float): ความเร็ว (m/s)
+            r (float): blend radius ที่จุดผ่าน (เมตร) จุดสุดท้ายหยุดเสมอ
+            radii (list): blend radius แยกแต่ละจุด ใช้แทน r ถ้าระบุ (เช่นจาก blendRadius.blend_path)
+                ไม่ถูกเก็บลงไฟล์คลัง
+        """
+        self.name = name
+        self.poses = [list(p) for p in poses]
+        self.kinds = list(kinds) if kinds is not None else ["movel"] * len(self.poses)
+        self.a = a
+        self.v = v
+        self.r = r
+        self.radii = list(radii) if radii is not None else None
+
+    def __len__(self):
+        return len(self.poses)
+
+    def __repr__(self):
+        return f"WaypointPath({self.name!r}, {len(self)} จุด, a={self.a}, v={self.v}, r={self.r})"
+
+
+def write_library(filename, paths):
+    """
+    เขียนคลังเส้นทางลงไฟล์
+
+    Args:
+        filename (str): ไฟล์ปลายทาง
+        paths (iterable): WaypointPath (ชื่อต้องไม่ซ้ำกัน)
+    """
+    paths = sorted(paths, key=lambda p: p.name.encode('utf-8'))
+    names = [p.name.encode('utf-8') for p in paths]
+    if len(set(names)) != len(names):
+        raise ValueError("ชื่อเส้นทางซ้ำกัน")
+
+    with open(filename, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        data_offsets = []
+        for path in paths:
+            data_offsets.append(f.tell())
+            for pose in path.poses:
+                f.write(_POSE.pack(*pose))
+            f.write(bytes(KINDS.index(k) for k in path.kinds))
+            f.write(b"\0" * (-f.tell() % 8))
+
+        index_offset = f.tell()
+        name_offset = 0
+        for path, name, data_offset in zip(paths, names, data_offsets):
+            f.write(_ENTRY.pack(name_offset, len(name), 0, len(path.poses), data_offset,
+                                path.a, path.v, path.r))
+            name_offset += len(name)
+        strings_offset = f.tell()
+        f.write(b"".join(names))
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, len(paths), index_offset, strings_offset))
+
+
+class WaypointLibrary:
+    def __init__(self, filename):
+        """
+        เปิดคลังเส้นทางแบบ memory-mapped (อ่านเฉพาะ header ตอนเปิด)
+
+        Args:
+            filename (str): ไฟล์ .urwp
+        """
+        self.filename = filename
+        self._file = open(filename, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self._index, self._strings = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{filename} ไม่ใช่ไฟล์คลังเส้นทางที่รองรับ")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, name):
+        return self._find(name) is not None
+
+    def _entry(self, i):
+        return _ENTRY.unpack_from(self._map, self._index + i * _ENTRY.size)
+
+    def _name(self, entry):
+        start = self._strings + entry[0]
+        return self._map[start:start + entry[1]]
+
+    def _find(self, name):
+        key = name.encode('utf-8')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self._entry(mid)
+            current = self._name(entry)
+            if current == key:
+                return entry
+            if current < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def names(self):
+        """ชื่อเส้นทางทั้งหมด เรียงตามตัวอักษร"""
+        for i in range(self.count):
+            yield self._name(self._entry(i)).decode('utf-8')
+
+    def get(self, name):
+        """
+        อ่านเส้นทางตามชื่อ (แปลงข้อมูลเฉพาะเส้นทางนี้)
+
+        Returns:
+            WaypointPath: หรือ None ถ้าไม่พบ
+        """
+        entry = self._find(name)
+        if entry is None:
+            return None
+        _, _, _, n, offset, a, v, r = entry
+        poses = [_POSE.unpack_from(self._map, offset + i * _POSE.size) for i in range(n)]
+        kinds_start = offset + n * _POSE.size
+        kinds = [KINDS[k] for k in self._map[kinds_start:kinds_start + n]]
+        return WaypointPath(name, poses, kinds, a, v, r)
+
+    def __getitem__(self, name):
+        path = self.get(name)
+        if path is None:
+            raise KeyError(name)
+        return path
+
+
+def load_text(filename, name=None, **params):
+    """
+    อ่านเส้นทางจากไฟล์ข้อความ หนึ่งบรรทัดต่อหนึ่งจุด: [movej|movel] x y z rx ry rz
+    (คั่นด้วยช่องว่างหรือจุลภาค, # คือหมายเหตุ, ไม่ระบุชนิดคือ movel)
+
+    Args:
+        filename (str): ไฟล์ข้อความ
+        name (str): ชื่อเส้นทาง - None คือใช้ชื่อไฟล์
+        params: a, v, r ส่งต่อให้ WaypointPath
+
+    Returns:
+        WaypointPath
+    """
+    poses, kinds = [], []
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            fields = line.split("#", 1)[0].replace(",", " ").split()
+            if not fields:
+                continue
+            kind = fields.pop(0) if fields[0] in KINDS else "movel"
+            if len(fields) != 6:
+                raise ValueError(f"{filename}: ต้องมี 6 ค่าต่อบรรทัด: {line.strip()}")
+            poses.append([float(v) for v in fields])
+            kinds.append(kind)
+    if name is None:
+        name = os.path.splitext(os.path.basename(filename))[0]
+    return WaypointPath(name, poses, kinds, **params)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) >= 3 and argv[0] == "build":
+        paths = [load_text(fn) for fn in argv[2:]]
+        write_library(argv[1], paths)
+        print(f"เขียน {len(paths)} เส้นทางลง {argv[1]}")
+    elif len(argv) == 2 and argv[0] == "list":
+        with WaypointLibrary(argv[1]) as library:
+            for name in library.names():
+                print(library[name])
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())